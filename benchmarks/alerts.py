@@ -0,0 +1,123 @@
+"""
+Проверка ценовых алертов на миллионе синтетических алертов: загрузка индекса из базы, память
+и стоимость одного тика против прохода по всем алертам. Сработавшие множества обязаны совпасть.
+Запуск из корня репозитория: python -m benchmarks.alerts [алертов] [тиков]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import deque
+
+import database
+from src.services.alerts import AlertEngine, ABOVE, BELOW, MOVE
+
+COINS = 100
+TICK = 60                   # секунд между снимками
+VOLATILITY = 0.004          # стандартное отклонение изменения цены за тик
+
+
+def seed(path: str, count: int, start_prices: dict):
+    db = sqlite3.connect(path)
+    rows = []
+    coin_ids = list(start_prices)
+    for alert_id in range(1, count + 1):
+        coin_id = random.choice(coin_ids)
+        price = start_prices[coin_id]
+        kind = random.choice((ABOVE, BELOW, MOVE))
+        if kind == ABOVE:
+            value = price * random.uniform(1.0, 1.3)
+        elif kind == BELOW:
+            value = price * random.uniform(0.7, 1.0)
+        else:
+            value = random.uniform(1, 10)
+        rows.append((alert_id, alert_id % 200_000, coin_id, kind, value, 0.0))
+    db.executemany("INSERT INTO alerts VALUES (?, ?, ?, ?, ?, ?)", rows)
+    db.commit()
+    db.close()
+    return [(alert_id, coin_id, kind, value) for alert_id, _, coin_id, kind, value, _ in rows]
+
+
+class NaiveScan:
+    """Прежний способ: на каждом тике перебираем все алерты"""
+
+    def __init__(self, rows: list, move_window: float):
+        self.rows = rows
+        self.active = set(row[0] for row in rows)
+        self.move_window = move_window
+        self.history = {}
+
+    def evaluate(self, prices: dict, taken_at: float) -> set:
+        changes = {}
+        for coin_id, values in prices.items():
+            history = self.history.setdefault(coin_id, deque())
+            while history and history[0][0] < taken_at - self.move_window:
+                history.popleft()
+            history.append((taken_at, values["usd"]))
+            changes[coin_id] = abs(values["usd"] / history[0][1] - 1) * 100
+        fired = set()
+        for alert_id, coin_id, kind, value in self.rows:
+            if alert_id not in self.active:
+                continue
+            price = prices[coin_id]["usd"]
+            if (kind == ABOVE and price >= value or kind == BELOW and price <= value
+                    or kind == MOVE and changes[coin_id] >= value):
+                fired.add(alert_id)
+        self.active -= fired
+        return fired
+
+
+async def run(count: int, ticks: int):
+    random.seed(1)
+    prices = {f"coin-{i}": random.uniform(0.01, 60000) for i in range(COINS)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        await database.connect_db(path)
+        await database.init_db()
+        rows = seed(path, count, prices)
+
+        engine = AlertEngine()
+        started = time.perf_counter()
+        await engine.reload(lambda user_id: True)
+        load = time.perf_counter() - started
+        await database.close_db()
+    index_size = sum(
+        sys.getsizeof(thresholds) + sum(sys.getsizeof(a) for a in (thresholds.keys, thresholds.alert_ids,
+                                                                     thresholds.user_ids))
+        for by_coin in engine._index.values() for thresholds in by_coin.values()
+    )
+    print(f"{count:,} alerts: loaded in {load:.2f}s, index {index_size / 2**20:.1f} MB "
+          f"({index_size / count:.0f} bytes/alert)")
+
+    naive = NaiveScan(rows, engine.move_window)
+    indexed_time = naive_time = 0.0
+    fired_total = 0
+    now = time.time()
+    for tick in range(ticks):
+        for coin_id in prices:
+            prices[coin_id] *= 1 + random.gauss(0, VOLATILITY)
+        snapshot = {coin_id: {"usd": price} for coin_id, price in prices.items()}
+        taken_at = now + tick * TICK
+
+        started = time.perf_counter()
+        fired = engine.evaluate(snapshot, taken_at)
+        indexed_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = naive.evaluate(snapshot, taken_at)
+        naive_time += time.perf_counter() - started
+
+        assert {alert.alert_id for alert in fired} == expected, f"tick {tick}: fired sets differ"
+        fired_total += len(fired)
+
+    print(f"{ticks} ticks, {fired_total:,} fired ({fired_total / ticks:,.0f}/tick)")
+    print(f"indexed:    {indexed_time / ticks * 1000:8.2f} ms/tick")
+    print(f"full scan:  {naive_time / ticks * 1000:8.2f} ms/tick")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(run(args[0] if args else 1_000_000, args[1] if len(args) > 1 else 60))
@@ -0,0 +1,83 @@
+"""
+Скорость сборки клавиатуры выбора монет (путь callback_select_coin / callback_paginate_coins):
+сборка кнопок с нуля на каждый запрос против готовых шаблонов.
+Запуск из корня репозитория: python -m benchmarks.coins_keyboard [кол-во callback-ов]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from src.constants.locales import LEXICON
+from src.keyboards.coins_keyboard import coins_keyboard
+from src.services.market_cache import market_cache
+
+COINS = [{"id": f"coin-{i}", "symbol": f"c{i}"} for i in range(100)]
+
+
+def legacy_coins_keyboard(coins_data, page=0, per_page=15, selected_coins=(), language="ru"):
+    # Прежняя реализация: все pydantic-объекты создаются заново
+    total_pages = (len(coins_data) - 1) // per_page
+    page = max(0, min(page, total_pages))
+    start = page * per_page
+    kb_buttons, row = [], []
+    prefix_sel = LEXICON[language]["choose_coins_button_prefix_selected"]
+    prefix_not_sel = LEXICON[language]["choose_coins_button_prefix_not_selected"]
+    for coin in coins_data[start:start + per_page]:
+        prefix = prefix_sel if coin['id'] in selected_coins else prefix_not_sel
+        row.append(InlineKeyboardButton(
+            text=f"{prefix} {coin['symbol'].upper()}", callback_data=f"coin_{coin['id']}_{page}"
+        ))
+        if len(row) == 3:
+            kb_buttons.append(row)
+            row = []
+    if row:
+        kb_buttons.append(row)
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton(text=LEXICON[language]["back"], callback_data=f"page_{page - 1}"))
+    if page < total_pages:
+        nav_row.append(InlineKeyboardButton(text=LEXICON[language]["forward"], callback_data=f"page_{page + 1}"))
+    if nav_row:
+        kb_buttons.append(nav_row)
+    if selected_coins:
+        kb_buttons.append([
+            InlineKeyboardButton(text=LEXICON[language]["reset_selection"], callback_data="reset_selection"),
+            InlineKeyboardButton(text=LEXICON[language]["confirm_selection"], callback_data="confirm_selection"),
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=kb_buttons)
+
+
+async def run(callbacks: int):
+    random.seed(1)
+    market_cache.coins[:] = COINS
+    market_cache._notify()
+    requests = [
+        (random.randrange(7), set(random.sample([c["id"] for c in COINS], random.randint(0, 3))),
+         random.choice(["en", "ru"]))
+        for _ in range(callbacks)
+    ]
+
+    for page, selected, language in requests[:200]:
+        new = await coins_keyboard(page=page, selected_coins=selected, language=language)
+        old = legacy_coins_keyboard(COINS, page=page, selected_coins=selected, language=language)
+        assert new.model_dump() == old.model_dump()
+
+    started = time.perf_counter()
+    for page, selected, language in requests:
+        legacy_coins_keyboard(COINS, page=page, selected_coins=selected, language=language)
+    legacy = callbacks / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for page, selected, language in requests:
+        await coins_keyboard(page=page, selected_coins=selected, language=language)
+    cached = callbacks / (time.perf_counter() - started)
+
+    print(f"rebuild per callback: {legacy:10.0f} callbacks/sec")
+    print(f"cached templates:     {cached:10.0f} callbacks/sec  (x{cached / legacy:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
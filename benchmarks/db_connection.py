@@ -0,0 +1,49 @@
+"""
+Сравнение скорости чтения: новое соединение на каждый вызов против общего соединения.
+Запуск из корня репозитория: python -m benchmarks.db_connection [кол-во операций]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+import database
+
+
+async def legacy_get_language(path: str, user_id: int):
+    # Так работали все функции database.py до общего соединения
+    async with aiosqlite.connect(path) as db:
+        cursor = await db.execute("SELECT language FROM users WHERE user_id = ?", (user_id,))
+        result = await cursor.fetchone()
+        return result[0] if result else 'en'
+
+
+async def run(ops: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        await database.connect_db(path)
+        await database.init_db()
+        for user_id in range(1000):
+            await database.add_user(user_id, f"user{user_id}")
+
+        started = time.perf_counter()
+        for i in range(ops):
+            await legacy_get_language(path, i % 1000)
+        legacy = ops / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for i in range(ops):
+            await database.get_language(i % 1000)
+        pooled = ops / (time.perf_counter() - started)
+
+        await database.close_db()
+
+    print(f"connect-per-call: {legacy:10.0f} ops/sec")
+    print(f"shared connection: {pooled:9.0f} ops/sec  (x{pooled / legacy:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,54 @@
+"""
+Время восстановления состояния при старте в зависимости от числа пользователей.
+Запуск из корня репозитория: python -m benchmarks.hydration [кол-во пользователей ...]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import database
+from src.constants import states
+from src.services.hydration import hydrate_state
+
+COINS = ["bitcoin", "ethereum", "solana", "ripple", "cardano", "dogecoin", "tron", "polkadot"]
+
+
+async def seed(users: int):
+    db = await database._conn()
+    now = time.time()
+    rows = []
+    for user_id in range(users):
+        interval = random.choice([0, 1800, 3600, 86400])
+        rows.append((
+            user_id, random.choice(["en", "ru"]), json.dumps(random.sample(COINS, 3)),
+            interval, now + random.uniform(-3600, 3600) if interval else None
+        ))
+    await db.executemany(
+        "INSERT INTO users (user_id, language, coins, notify_interval, next_notify_at) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    await db.commit()
+
+
+async def run(sizes):
+    for users in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            await database.connect_db(os.path.join(tmp, "bench.db"))
+            await database.init_db()
+            await seed(users)
+            for state in (states.user_intervals, states.user_next_notify):
+                state.clear()
+
+            started = time.perf_counter()
+            await hydrate_state()
+            elapsed = time.perf_counter() - started
+            await database.close_db()
+        print(f"{users:>9} users: {elapsed:7.3f}s  ({users / elapsed:,.0f} users/sec)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 500000]))
@@ -0,0 +1,66 @@
+"""
+Отзывчивость event loop во время медленных ответов ЮKassa.
+Поднимает локальный заглушечный сервер платежей, который отвечает с задержкой,
+и измеряет максимальную задержку тиков loop при одновременных проверках оплаты.
+Запуск из корня репозитория: python -m benchmarks.payments_responsiveness
+"""
+import asyncio
+import time
+
+from aiohttp import web
+from yookassa import Configuration
+
+from src.services import payments
+
+STUB_DELAY = 0.5
+PAYMENT = {
+    "id": "stub", "status": "succeeded", "paid": True,
+    "amount": {"value": "100.00", "currency": "RUB"},
+    "created_at": "2025-01-01T00:00:00.000Z", "test": True,
+}
+
+
+async def find_payment(request):
+    await asyncio.sleep(STUB_DELAY)
+    return web.json_response({**PAYMENT, "id": request.match_info["payment_id"]})
+
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+async def run(checks: int = 8):
+    app = web.Application()
+    app.router.add_get("/v3/payments/{payment_id}", find_payment)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    Configuration.configure("stub-shop", "stub-key", api_url=f"http://127.0.0.1:{port}/v3")
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(payments.verify_payment(f"p{i}") for i in range(checks)))
+    elapsed = time.perf_counter() - started
+    cached_started = time.perf_counter()
+    await payments.verify_payment("p0")
+    cached = time.perf_counter() - cached_started
+    stop.set()
+    worst_lag = await lag_task
+
+    await runner.cleanup()
+    payments.shutdown_payments()
+    print(f"{checks} checks against a {STUB_DELAY}s stub: {elapsed:.2f}s, all succeeded: {all(results)}")
+    print(f"worst event loop lag: {worst_lag * 1000:.1f} ms (a blocking call would stall ~{STUB_DELAY * checks:.1f}s)")
+    print(f"repeated check from status cache: {cached * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
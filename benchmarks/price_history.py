@@ -0,0 +1,93 @@
+"""
+История цен: память и место в базе на монету при многодневной записи.
+Имитируется снимок цен всех монет раз в минуту и сброс в базу раз в PRICE_HISTORY_FLUSH_INTERVAL.
+Запуск из корня репозитория: python -m benchmarks.price_history [монет] [дней]
+
+Замер на 100 монетах за 10 дней (Python 3.11): память постоянна — 18.5 КБ на монету;
+в базе ~320 строк / ~21 КБ на монету после заполнения часовых баров (8 дней), дальше растут только
+дневные до 90 штук. Запись ~140 000 цен в секунду, сброс в базу ~12 мс на 100 монет.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import database
+from src.constants.constants import PRICE_HISTORY_FLUSH_INTERVAL
+from src.services.price_history import PriceHistory
+
+SNAPSHOT_INTERVAL = 60
+DAY = 86400
+
+
+def memory_per_coin(history: PriceHistory) -> float:
+    total = 0
+    for rings in history._coins.values():
+        for ring in rings.values():
+            total += sys.getsizeof(ring) + sum(
+                sys.getsizeof(a) for a in (ring.buckets, ring.open, ring.high, ring.low, ring.close)
+            )
+    return total / len(history)
+
+
+def disk_per_coin(path: str, coins: int) -> tuple:
+    db = sqlite3.connect(path)
+    (rows,) = db.execute("SELECT COUNT(*) FROM price_history").fetchone()
+    (used,) = db.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name IN ('price_history')"
+    ).fetchone() if _has_dbstat(db) else (None,)
+    db.close()
+    return rows / coins, (used or 0) / coins
+
+
+def _has_dbstat(db) -> bool:
+    try:
+        db.execute("SELECT 1 FROM dbstat LIMIT 1")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+async def run(coins: int, days: int):
+    random.seed(1)
+    prices = {f"coin-{i}": random.uniform(0.01, 60000) for i in range(coins)}
+    history = PriceHistory()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        await database.connect_db(path)
+        await database.init_db()
+
+        start = time.time() // DAY * DAY
+        recorded = 0
+        record_time = flush_time = 0.0
+        for day in range(days):
+            for minute in range(DAY // SNAPSHOT_INTERVAL):
+                ts = start + day * DAY + minute * SNAPSHOT_INTERVAL
+                started = time.perf_counter()
+                for coin_id in prices:
+                    prices[coin_id] *= 1 + random.gauss(0, 0.001)
+                    history.on_price(coin_id, {"usd": prices[coin_id]}, ts)
+                record_time += time.perf_counter() - started
+                recorded += coins
+                if (minute * SNAPSHOT_INTERVAL) % PRICE_HISTORY_FLUSH_INTERVAL == 0:
+                    started = time.perf_counter()
+                    await history.flush(ts)
+                    flush_time += time.perf_counter() - started
+            rows, used = disk_per_coin(path, coins)
+            print(f"day {day + 1:>3}: memory {memory_per_coin(history) / 1024:5.1f} KB/coin, "
+                  f"disk {rows:5.0f} rows" + (f" / {used / 1024:5.1f} KB" if used else "") + " per coin")
+
+        await database.close_db()
+    flushes = days * DAY // PRICE_HISTORY_FLUSH_INTERVAL
+    print(f"record: {recorded / record_time:,.0f} prices/sec; flush: {flush_time / flushes * 1000:.1f} ms "
+          f"per {coins} coins")
+    coin_id = next(iter(prices))
+    print(f"{coin_id}: {history.summary(coin_id, now=ts)}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(run(args[0] if args else 100, args[1] if len(args) > 1 else 10))
@@ -0,0 +1,52 @@
+"""
+Стоимость одного тика рассылки: полный обход user_next_notify каждые 15 секунд
+против min-кучи NotificationScheduler.
+Запуск из корня репозитория: python -m benchmarks.scheduler [кол-во подписок]
+"""
+import random
+import sys
+import time
+
+from src.services.scheduler import NotificationScheduler
+
+TICK = 15
+INTERVALS = [1800, 3600, 10800, 43200, 86400]
+
+
+def run(subscriptions: int, ticks: int = 240):
+    random.seed(1)
+    start = 1_000_000.0
+    intervals = {uid: random.choice(INTERVALS) for uid in range(subscriptions)}
+    initial = {uid: start + random.uniform(0, intervals[uid]) for uid in range(subscriptions)}
+
+    # Старый способ: обход всех записей на каждом тике
+    next_notify = dict(initial)
+    fired = 0
+    started = time.process_time()
+    for tick in range(1, ticks + 1):
+        now = start + tick * TICK
+        for uid, nxt in list(next_notify.items()):
+            if now >= nxt:
+                next_notify[uid] = now + intervals[uid]
+                fired += 1
+    scan = (time.process_time() - started) / ticks
+
+    scheduler = NotificationScheduler({})
+    for uid, due_at in initial.items():
+        scheduler.schedule(uid, due_at)
+    heap_fired = 0
+    started = time.process_time()
+    for tick in range(1, ticks + 1):
+        now = start + tick * TICK
+        for uid in scheduler.pop_due(now):
+            scheduler.schedule(uid, now + intervals[uid])
+            heap_fired += 1
+    heap = (time.process_time() - started) / ticks
+
+    print(f"subscriptions: {subscriptions}, ticks: {ticks}, due per tick: {fired / ticks:.1f}")
+    print(f"full scan: {scan * 1000:9.3f} ms CPU per tick")
+    print(f"min-heap:  {heap * 1000:9.3f} ms CPU per tick  ({heap_fired} fired)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
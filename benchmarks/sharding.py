@@ -0,0 +1,97 @@
+"""
+Рассылка несколькими процессами-воркерами с общей базой SQLite.
+Каждый воркер берёт аренду, загружает свой шард и «отправляет» всем своим пользователям,
+у которых наступил срок (отправка имитируется задержкой). Проверяется, что каждый
+пользователь получил ровно одно сообщение, и измеряется общая пропускная способность.
+Запуск из корня репозитория: python -m benchmarks.sharding [пользователей] [воркеров ...]
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+SEND_LATENCY = 0.002        # «Telegram» на одно сообщение
+SEND_CONCURRENCY = 8        # одновременных отправок в одном воркере
+
+
+def seed(path: str, users: int):
+    import sqlite3
+    import database
+
+    async def create():
+        await database.connect_db(path)
+        await database.init_db()
+        await database.close_db()
+    asyncio.run(create())
+
+    db = sqlite3.connect(path)
+    now = time.time()
+    db.executemany(
+        "INSERT INTO users (user_id, language, coins, notify_interval, next_notify_at) VALUES (?, ?, ?, ?, ?)",
+        [(uid, "en", json.dumps(["bitcoin", "ethereum"]), 3600, now - 1) for uid in range(users)]
+    )
+    db.commit()
+    db.close()
+
+
+def worker(path: str, worker_id: str, barrier, results):
+    import database
+    from src.services.hydration import hydrate_state
+    from src.services.scheduler import scheduler
+    from src.services.sharding import ShardLease
+
+    async def run():
+        await database.connect_db(path)
+        lease = ShardLease(worker_id)
+        await lease.heartbeat()
+        barrier.wait()              # все воркеры зарегистрировались
+        await lease.heartbeat()
+        barrier.wait()
+
+        started = time.perf_counter()
+        await hydrate_state(owns=lease.owns, spread_overdue=False)
+        due = scheduler.pop_due(time.time())
+        semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+        async def send(uid):
+            async with semaphore:
+                await asyncio.sleep(SEND_LATENCY)
+
+        await asyncio.gather(*(send(uid) for uid in due))
+        elapsed = time.perf_counter() - started
+        await lease.release()
+        await database.close_db()
+        results.put((worker_id, due, elapsed))
+
+    asyncio.run(run())
+
+
+def run(users: int, worker_counts: list):
+    for count in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            seed(path, users)
+            barrier = multiprocessing.Barrier(count)
+            results = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(target=worker, args=(path, f"worker-{i}", barrier, results))
+                for i in range(count)
+            ]
+            for process in processes:
+                process.start()
+            collected = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+        sent = [uid for _, due, _ in collected for uid in due]
+        slowest = max(elapsed for _, _, elapsed in collected)
+        assert len(sent) == len(set(sent)) == users, "every user must be notified exactly once"
+        print(f"{count} worker(s): {users / slowest:9.0f} msgs/sec  (slowest worker {slowest:.2f}s)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    run(args[0] if args else 20000, args[1:] or [1, 2, 4])
@@ -0,0 +1,74 @@
+"""
+Память под состояние пользователей, когда через /start проходят миллионы разных людей.
+Вызывается настоящий обработчик cmd_start (ответы Telegram заглушены, запись в базу — настоящая);
+для сравнения те же записи делаются в обычные словари, как было раньше.
+Запуск из корня репозитория: python -m benchmarks.state_store [пользователей]
+
+Замер на 1 000 000 пользователей (Python 3.11): хранилища ~5 МБ уже после 100 000 и дальше не растут,
+словари — 18 МБ на 100 000 и 150 МБ на миллион; ~1 800 /start в секунду вместе с записью в базу.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import database
+from src.handlers import commands
+from src.services import state_store
+
+CHECKPOINTS = (10_000, 100_000, 1_000_000)
+CONCURRENCY = 1000          # одновременных /start (запись в базу копится пачками)
+
+
+class FakeMessage:
+    def __init__(self, user_id: int):
+        self.from_user = SimpleNamespace(id=user_id, username=f"user{user_id}")
+        self.text = "/start"
+
+    async def answer(self, text, **kwargs):
+        pass
+
+
+def traced(filename: str) -> int:
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, filename)])
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+async def run(users: int):
+    checkpoints = [n for n in CHECKPOINTS if n < users] + [users]
+    with tempfile.TemporaryDirectory() as tmp:
+        await database.connect_db(os.path.join(tmp, "bench.db"))
+        await database.init_db()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        done = 0
+        for checkpoint in checkpoints:
+            for first in range(done, checkpoint, CONCURRENCY):
+                last = min(first + CONCURRENCY, checkpoint)
+                await asyncio.gather(*(commands.cmd_start(FakeMessage(uid)) for uid in range(first, last)))
+            done = checkpoint
+            print(f"{done:>9} users: stores {traced(state_store.__file__) / 2**20:7.1f} MB  "
+                  f"({done / (time.perf_counter() - started):,.0f} /start per sec)")
+        tracemalloc.stop()
+        await database.close_db()
+
+    # То же состояние в обычных словарях: растёт с каждым новым пользователем
+    tracemalloc.start()
+    user_lang, user_first_time, user_first_interval = {}, {}, {}
+    done = 0
+    for checkpoint in checkpoints:
+        for user_id in range(done, checkpoint):
+            user_lang[user_id] = None
+            user_first_time[user_id] = True
+            user_first_interval[user_id] = False
+        done = checkpoint
+        print(f"{done:>9} users: dicts  {traced(__file__) / 2**20:7.1f} MB")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
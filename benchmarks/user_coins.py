@@ -0,0 +1,120 @@
+"""
+Монеты пользователей в таблице user_coins против JSON в users.coins: перенос старой базы
+и запросы «кто следит за монетой», «какие монеты отслеживаются», «сколько подписчиков у монет».
+Запуск из корня репозитория: python -m benchmarks.user_coins [пользователей]
+
+Замер на 200 000 пользователей по 1-5 монет из 300 (Python 3.11): перенос ~2.8 с, самая долгая
+транзакция ~20 мс (бот между порциями не блокируется). Прежний способ — прочитать и разобрать все JSON —
+~880 мс на любой вопрос; по user_coins подписчики популярной монеты (77 000) ~105 мс,
+отслеживаемые монеты ~35 мс, число подписчиков по всем монетам ~380 мс.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import database
+
+COINS = [f"coin-{i}" for i in range(300)]
+
+
+def seed_legacy(path: str, users: int):
+    """Старая схема: монеты строкой JSON"""
+    db = sqlite3.connect(path)
+    db.execute('''
+        CREATE TABLE users (
+            user_id INTEGER PRIMARY KEY, username TEXT, language TEXT DEFAULT 'en',
+            coins TEXT DEFAULT '["bitcoin", "ethereum", "solana"]', premium BOOLEAN DEFAULT FALSE,
+            notify_interval INTEGER DEFAULT 0, referrer_id INTEGER
+        )
+    ''')
+    weights = [1 / (rank + 1) for rank in range(len(COINS))]
+    db.executemany(
+        "INSERT INTO users (user_id, coins) VALUES (?, ?)",
+        ((user_id, json.dumps(list(dict.fromkeys(random.choices(COINS, weights, k=random.randint(1, 5))))))
+         for user_id in range(users))
+    )
+    db.commit()
+    db.close()
+
+
+def legacy_scan(path: str) -> dict:
+    """Прежний способ ответить на любой вопрос о подписках: прочитать и разобрать все строки"""
+    db = sqlite3.connect(path)
+    subscribers = {}
+    for user_id, coins in db.execute("SELECT user_id, coins FROM users WHERE active"):
+        for coin_id in json.loads(coins):
+            subscribers.setdefault(coin_id, []).append(user_id)
+    db.close()
+    return subscribers
+
+
+async def timed(coro) -> tuple:
+    started = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - started
+
+
+async def run(users: int):
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_legacy(path, users)
+        await database.connect_db(path)
+        await database.init_db()
+
+        # Самая долгая транзакция переноса — столько в худшем случае ждёт запись бота
+        longest = 0.0
+        commit = database._db.commit
+
+        async def timed_commit():
+            nonlocal longest
+            started = time.perf_counter()
+            await commit()
+            longest = max(longest, time.perf_counter() - started)
+
+        database._db.commit = timed_commit
+        started = time.perf_counter()
+        migrated = await database.migrate_user_coins()
+        migration = time.perf_counter() - started
+        database._db.commit = commit
+        print(f"{migrated:,} users migrated in {migration:.2f}s, longest commit {longest * 1000:.1f} ms")
+
+        # Старую схему воспроизводим копией тех же данных в JSON для честного сравнения
+        legacy_path = os.path.join(tmp, "legacy.db")
+        seed_legacy_copy = sqlite3.connect(legacy_path)
+        seed_legacy_copy.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, coins TEXT, active BOOLEAN)")
+        rows = []
+        async with database._db.execute(
+            f"SELECT user_id, {database.USER_COINS_SQL}, active FROM users"
+        ) as cursor:
+            rows = await cursor.fetchall()
+        seed_legacy_copy.executemany("INSERT INTO users VALUES (?, ?, ?)", rows)
+        seed_legacy_copy.commit()
+        seed_legacy_copy.close()
+
+        started = time.perf_counter()
+        legacy = legacy_scan(legacy_path)
+        scan = time.perf_counter() - started
+
+        popular = COINS[0]
+        subscribers, by_coin = await timed(database.get_coin_subscribers(popular))
+        tracked, union = await timed(database.get_tracked_coins())
+        counts, grouped = await timed(database.count_coin_subscribers())
+        assert subscribers == sorted(legacy[popular])
+        assert tracked == set(legacy)
+        assert counts == {coin_id: len(ids) for coin_id, ids in legacy.items()}
+
+        print(f"legacy JSON scan (any question): {scan * 1000:7.1f} ms")
+        print(f"subscribers of {popular} ({len(subscribers):,}): {by_coin * 1000:7.1f} ms")
+        print(f"tracked coins ({len(tracked)}):       {union * 1000:7.1f} ms")
+        print(f"subscribers per coin:            {grouped * 1000:7.1f} ms")
+        await database.close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
@@ -0,0 +1,140 @@
+"""
+Нагрузочный тест: одни и те же обновления обрабатываются через long polling и через webhook.
+Локальный сервер изображает Bot API (getUpdates/sendMessage), обработчик отвечает на каждое
+сообщение, как /price. Считаются обработанные обновления в секунду.
+Запуск из корня репозитория: python -m benchmarks.webhook_load [кол-во обновлений]
+"""
+import asyncio
+import json
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+
+from src.services.webhook import build_webhook_app
+
+TOKEN = "42:benchmark"
+SECRET = "benchmark-secret"
+API_LATENCY = 0.02      # задержка «Telegram» на sendMessage
+
+
+def recorded_updates(count: int) -> list:
+    return [{
+        "update_id": i + 1,
+        "message": {
+            "message_id": i + 1, "date": 0, "text": "/price",
+            "chat": {"id": 1000 + i % 500, "type": "private"},
+            "from": {"id": 1000 + i % 500, "is_bot": False, "first_name": "user"},
+        },
+    } for i in range(count)]
+
+
+def fake_bot_api(updates: list) -> web.Application:
+    async def handle(request):
+        method = request.match_info["method"]
+        if method == "getMe":
+            result = {"id": 42, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            data = await request.post()
+            offset = int(data.get("offset") or 0)
+            result = [u for u in updates if u["update_id"] >= offset][:100]
+            if not result:
+                await asyncio.sleep(0.05)
+        elif method == "sendMessage":
+            await asyncio.sleep(API_LATENCY)
+            data = await request.post()
+            result = {"message_id": 1, "date": 0, "text": data.get("text", ""),
+                      "chat": {"id": int(data["chat_id"]), "type": "private"}}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    return app
+
+
+async def start(app: web.Application) -> tuple:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def make_dispatcher(total: int, done: asyncio.Event) -> Dispatcher:
+    router = Router()
+    handled = 0
+
+    @router.message()
+    async def answer(message: Message):
+        nonlocal handled
+        await message.answer("price")
+        handled += 1
+        if handled == total:
+            done.set()
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+async def bench_polling(api_port: int, total: int) -> float:
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}")))
+    done = asyncio.Event()
+    dp = make_dispatcher(total, done)
+    started = time.perf_counter()
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=1))
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await dp.stop_polling()
+    await polling
+    return total / elapsed
+
+
+async def bench_webhook(api_port: int, updates: list, concurrency: int = 50) -> float:
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}")))
+    done = asyncio.Event()
+    dp = make_dispatcher(len(updates), done)
+    app, _ = build_webhook_app(bot, dp, SECRET, path="/webhook")
+    runner, port = await start(app)
+    url = f"http://127.0.0.1:{port}/webhook"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET, "Content-Type": "application/json"}
+    queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(json.dumps(update))
+
+    async def client(session):
+        while not queue.empty():
+            body = queue.get_nowait()
+            async with session.post(url, data=body, headers=headers) as response:
+                assert response.status == 200
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data="{}", headers={"Content-Type": "application/json"}) as response:
+            assert response.status == 401, "secret token must be checked"
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    await done.wait()
+    elapsed = time.perf_counter() - started
+    await runner.cleanup()
+    return len(updates) / elapsed
+
+
+async def run(total: int):
+    updates = recorded_updates(total)
+    api_runner, api_port = await start(fake_bot_api(updates))
+    polling = await bench_polling(api_port, total)
+    webhook = await bench_webhook(api_port, updates)
+    await api_runner.cleanup()
+    print(f"long polling: {polling:8.0f} updates/sec")
+    print(f"webhook:      {webhook:8.0f} updates/sec")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
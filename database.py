@@ -1,99 +1,827 @@
+import asyncio
+import itertools
+import logging
 import aiosqlite
 import json
+import sys
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
 
 DATABASE = "data/bot.db"
 
+# Настройки SQLite для одного долгоживущего соединения
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # ~16 МБ страничного кеша
+    "PRAGMA mmap_size=134217728",    # 128 МБ memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+CACHED_STATEMENTS = 128              # кеш подготовленных выражений sqlite3
+
+# Отложенная запись: изменения копятся и коммитятся одной транзакцией
+WRITE_BEHIND_DELAY = 0.05            # окно сбора изменений, секунды
+WRITE_BEHIND_MAX_BATCH = 200         # при таком числе изменений коммит не ждёт окна
+WRITE_BEHIND_DURABLE = True          # True — setter ждёт коммита, False — возвращается сразу
+
+PROFILE_CACHE_SIZE = 50000           # сколько профилей держим в памяти (LRU)
+PROFILE_BATCH = 500                  # id в одном SELECT ... IN при чтении профилей пачкой
+DEFAULT_COINS = ["bitcoin", "ethereum", "solana"]
+COINS_MIGRATION_CHUNK = 2000         # пользователей за одну транзакцию переноса монет из JSON
+USER_CHANGES_RETENTION = 600         # сколько секунд хранить журнал изменений пользователей для воркеров рассылки
+
+# Монеты пользователя одной JSON-строкой по порядку выбора: из user_coins, а у ещё
+# не перенесённых пользователей — из старой колонки users.coins
+USER_COINS_SQL = (
+    "COALESCE(users.coins, (SELECT json_group_array(coin_id) FROM "
+    "(SELECT coin_id FROM user_coins WHERE user_coins.user_id = users.user_id ORDER BY position)))"
+)
+
+_db = None
+_coins_migrated = False              # в users.coins не осталось JSON — запросы идут прямо в user_coins
+
+
+async def connect_db(path: str = DATABASE):
+    """Открывает общее соединение (один раз за время жизни процесса)"""
+    global _db
+    if _db is None:
+        _db = await aiosqlite.connect(path, cached_statements=CACHED_STATEMENTS)
+        for pragma in PRAGMAS:
+            await _db.execute(pragma)
+    return _db
+
+async def close_db():
+    global _db
+    await _writer.flush()
+    if _db is not None:
+        await _db.commit()
+        await _db.close()
+        _db = None
+
+async def _conn():
+    return _db if _db is not None else await connect_db()
+
+
+# ------------------------ Отложенная запись ------------------------
+class WriteBehindQueue:
+    def __init__(self, delay: float = WRITE_BEHIND_DELAY, max_batch: int = WRITE_BEHIND_MAX_BATCH,
+                 durable: bool = WRITE_BEHIND_DURABLE):
+        self.delay = delay
+        self.max_batch = max_batch
+        self.durable = durable
+        self._pending = []      # (sql, params, user_id, future | None)
+        self._users = {}        # user_id -> число ещё не записанных изменений
+        self._timer = None
+        self._flushing = None
+        self._lock = asyncio.Lock()
+
+    def has_pending(self, user_id: int = None) -> bool:
+        return user_id in self._users if user_id is not None else bool(self._pending)
+
+    async def submit(self, sql: str, params: tuple, user_id: int):
+        future = asyncio.get_running_loop().create_future() if self.durable else None
+        self._pending.append((sql, params, user_id, future))
+        self._users[user_id] = self._users.get(user_id, 0) + 1
+        if len(self._pending) >= self.max_batch:
+            self._flushing = asyncio.create_task(self.flush())
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        if future is not None:
+            await future
+
+    async def submit_many(self, ops: list, user_id: int):
+        """Несколько запросов [(sql, params), ...], которые должны попасть в одну транзакцию"""
+        future = asyncio.get_running_loop().create_future() if self.durable else None
+        for i, (sql, params) in enumerate(ops):
+            self._pending.append((sql, params, user_id, future if i == len(ops) - 1 else None))
+        self._users[user_id] = self._users.get(user_id, 0) + len(ops)
+        if len(self._pending) >= self.max_batch:
+            self._flushing = asyncio.create_task(self.flush())
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        if future is not None:
+            await future
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Записывает всё накопленное одной транзакцией (подряд идущие одинаковые запросы — executemany)"""
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            error = None
+            db = await _conn()
+            try:
+                for sql, ops in itertools.groupby(batch, key=lambda op: op[0]):
+                    await db.executemany(sql, [op[1] for op in ops])
+                await db.commit()
+            except Exception as e:
+                error = e
+                await db.rollback()
+                logger.error("Write-behind batch of %d operations failed: %r", len(batch), e)
+            for _, _, user_id, future in batch:
+                left = self._users.get(user_id, 1) - 1
+                if left:
+                    self._users[user_id] = left
+                else:
+                    self._users.pop(user_id, None)
+                if future is not None and not future.done():
+                    if error is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(error)
+
+
+_writer = WriteBehindQueue()
+
+
+async def _write(sql: str, params: tuple, user_id: int):
+    await _writer.submit(sql, params, user_id)
+
+async def _write_many(ops: list, user_id: int):
+    await _writer.submit_many(ops, user_id)
+
+async def _read_barrier(user_id: int = None):
+    """Чтение видит собственные записи: если по пользователю есть отложенные изменения — сбросить их"""
+    if _writer.has_pending(user_id):
+        await _writer.flush()
+
+
+# ------------------------ Кеш профилей пользователей ------------------------
+class UserProfile:
+    __slots__ = ("user_id", "language", "coins", "premium", "notify_interval")
+
+    def __init__(self, user_id: int, language: str, coins: tuple, premium: bool, notify_interval: int):
+        self.user_id = user_id
+        self.language = language
+        self.coins = coins
+        self.premium = premium
+        self.notify_interval = notify_interval
+
+
+_profiles = OrderedDict()   # user_id -> UserProfile
+_invalidations = 0          # счётчик сбросов: не кешируем строку, прочитанную до изменения
+
+
+async def get_user_profile(user_id: int):
+    """Профиль из памяти; при промахе — один SELECT. None, если пользователя нет в базе"""
+    profile = _profiles.get(user_id)
+    if profile is not None:
+        _profiles.move_to_end(user_id)
+        return profile
+    await _read_barrier(user_id)
+    invalidations = _invalidations
+    db = await _conn()
+    async with db.execute(
+        f"SELECT user_id, language, {USER_COINS_SQL}, premium, notify_interval FROM users WHERE user_id = ?",
+        (user_id,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    return _cache_profile(row, invalidations) if row is not None else None
+
+async def get_user_profiles(user_ids) -> dict:
+    """Профили пачкой: {user_id: UserProfile}; промахи кеша читаются SELECT ... IN по PROFILE_BATCH id"""
+    profiles = {}
+    missing = []
+    for user_id in user_ids:
+        profile = _profiles.get(user_id)
+        if profile is not None:
+            _profiles.move_to_end(user_id)
+            profiles[user_id] = profile
+        else:
+            missing.append(user_id)
+    if not missing:
+        return profiles
+    await _read_barrier()
+    invalidations = _invalidations
+    db = await _conn()
+    for i in range(0, len(missing), PROFILE_BATCH):
+        chunk = missing[i:i + PROFILE_BATCH]
+        async with db.execute(
+            f"SELECT user_id, language, {USER_COINS_SQL}, premium, notify_interval FROM users "
+            f"WHERE user_id IN ({','.join('?' * len(chunk))})", chunk
+        ) as cursor:
+            for row in await cursor.fetchall():
+                profiles[row[0]] = _cache_profile(row, invalidations)
+    return profiles
+
+def _cache_profile(row: tuple, invalidations: int) -> UserProfile:
+    user_id, language, coins, premium, notify_interval = row
+    # id монет повторяются у тысяч пользователей — храним одну копию строки
+    coins = tuple(sys.intern(coin_id) for coin_id in json.loads(coins))
+    profile = UserProfile(user_id, language, coins, bool(premium), notify_interval)
+    if invalidations == _invalidations:
+        _profiles[user_id] = profile
+        if len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+def invalidate_profile(user_id: int = None):
+    """Сбрасывает профиль пользователя, а без user_id — весь кеш (его меняет другой процесс)"""
+    global _invalidations
+    _invalidations += 1
+    if user_id is None:
+        _profiles.clear()
+    else:
+        _profiles.pop(user_id, None)
+
 
 async def init_db():
-    async with aiosqlite.connect(DATABASE) as db:
-        await db.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                username TEXT,
-                language TEXT DEFAULT 'en',
-                coins TEXT DEFAULT '["bitcoin", "ethereum", "solana"]',
-                premium BOOLEAN DEFAULT FALSE,
-                notify_interval INTEGER DEFAULT 0,
-                referrer_id INTEGER
+    db = await _conn()
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            language TEXT DEFAULT 'en',
+            coins TEXT DEFAULT '["bitcoin", "ethereum", "solana"]',
+            premium BOOLEAN DEFAULT FALSE,
+            notify_interval INTEGER DEFAULT 0,
+            referrer_id INTEGER,
+            next_notify_at REAL,
+            active BOOLEAN DEFAULT TRUE
+        )
+    ''')
+    await _add_missing_columns(db, "users", {"next_notify_at": "REAL", "active": "BOOLEAN DEFAULT TRUE"})
+    # Частичный индекс только по подписчикам: условие должно совпадать с WHERE в fetch_due_users
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_due ON users (next_notify_at) WHERE notify_interval > 0 AND active"
+    )
+    # Монеты пользователей: строка на (пользователь, монета) вместо JSON в users.coins.
+    # Индекс по монете покрывающий — «кто следит за монетой» и «какие монеты отслеживаются» не трогают users
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS user_coins (
+            user_id INTEGER NOT NULL,
+            coin_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (user_id, coin_id)
+        ) WITHOUT ROWID
+    ''')
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_user_coins_coin ON user_coins (coin_id, user_id)")
+    # Пользователи, чьи монеты ещё лежат в JSON; после переноса индекс пуст
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_legacy_coins ON users (user_id) WHERE coins IS NOT NULL"
+    )
+    # Все подписки: перенесённые и ещё не перенесённые — запросы ниже верны на любом этапе миграции
+    await db.execute('''
+        CREATE VIEW IF NOT EXISTS user_coin_rows AS
+            SELECT user_id, coin_id, position FROM user_coins
+            UNION ALL
+            SELECT users.user_id, legacy.value, legacy.key FROM users, json_each(users.coins) AS legacy
+            WHERE users.coins IS NOT NULL
+    ''')
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS payments (
+            payment_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            created_at REAL NOT NULL,
+            next_check_at REAL NOT NULL,
+            attempts INTEGER DEFAULT 0
+        )
+    ''')
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_payments_pending ON payments (status, next_check_at)"
+    )
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS alerts (
+            alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            coin_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            value REAL NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts (user_id)")
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS price_history (
+            coin_id TEXT NOT NULL,
+            step INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            PRIMARY KEY (coin_id, step, bucket)
+        ) WITHOUT ROWID
+    ''')
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            broadcast_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            admin_id INTEGER NOT NULL,
+            progress_message_id INTEGER,
+            status TEXT DEFAULT 'running',
+            total INTEGER NOT NULL,
+            last_user_id INTEGER DEFAULT -1,
+            sent INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        )
+    ''')
+    # Журнал изменённых пользователей: воркеры рассылки в других процессах дочитывают его
+    # вместо перечитывания всего шарда. Старые записи чистит heartbeat_worker
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS user_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            changed_at REAL NOT NULL
+        )
+    ''')
+    await db.execute('''
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            heartbeat_at REAL NOT NULL
+        )
+    ''')
+    await db.commit()
+
+async def _add_missing_columns(db, table: str, columns: dict):
+    """Миграция старых баз: добавляет колонки, которых ещё нет в таблице"""
+    async with db.execute(f"PRAGMA table_info({table})") as cursor:
+        existing = {row[1] for row in await cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+async def migrate_user_coins(chunk_size: int = COINS_MIGRATION_CHUNK) -> int:
+    """
+    Переносит монеты из JSON-колонки users.coins в user_coins порциями по chunk_size пользователей.
+    Каждая порция — отдельная короткая транзакция, так что бот работает во время переноса,
+    а чтение (USER_COINS_SQL, user_coin_rows) верно и до, и после неё.
+    """
+    db = await _conn()
+    migrated = 0
+    last_id = -1
+    while True:
+        async with _writer._lock:
+            async with db.execute(
+                "SELECT user_id FROM users WHERE coins IS NOT NULL AND user_id > ? ORDER BY user_id LIMIT ?",
+                (last_id, chunk_size)
+            ) as cursor:
+                user_ids = [row[0] for row in await cursor.fetchall()]
+            if not user_ids:
+                break
+            bounds = (last_id, user_ids[-1])
+            await db.execute(
+                "INSERT OR IGNORE INTO user_coins (user_id, coin_id, position) "
+                "SELECT users.user_id, legacy.value, legacy.key FROM users, json_each(users.coins) AS legacy "
+                "WHERE users.coins IS NOT NULL AND users.user_id > ? AND users.user_id <= ?", bounds
             )
-        ''')
-        await db.commit()
+            await db.execute(
+                "UPDATE users SET coins = NULL WHERE coins IS NOT NULL AND user_id > ? AND user_id <= ?", bounds
+            )
+            await db.commit()
+        migrated += len(user_ids)
+        last_id = user_ids[-1]
+        await asyncio.sleep(0)
+    global _coins_migrated
+    _coins_migrated = True
+    if migrated:
+        logger.info("Moved coins of %d users to user_coins", migrated)
+    return migrated
+
+def _coin_rows() -> str:
+    # Пока миграция не закончена, подписки читаются через представление с обеими схемами
+    return "user_coins" if _coins_migrated else "user_coin_rows"
+
+def _changed(user_id: int) -> tuple:
+    """Запись в журнал user_changes — добавляется в ту же транзакцию, что и само изменение"""
+    return "INSERT INTO user_changes (user_id, changed_at) VALUES (?, ?)", (user_id, time.time())
 
 async def add_user(user_id: int, username: str, referrer_id: int = None):
-    async with aiosqlite.connect(DATABASE) as db:
-        await db.execute(
-            "INSERT OR IGNORE INTO users (user_id, username, referrer_id) VALUES (?, ?, ?)",
-            (user_id, username, referrer_id)
-        )
-        await db.commit()
+    # Монеты по умолчанию получает только новый пользователь: вставка идёт до строки users в той же
+    # транзакции, поэтому у существующего (в том числе убравшего все монеты) она ничего не добавит.
+    # Повторный /start от пользователя, ранее заблокировавшего бота, снова делает его активным
+    await _write_many([
+        ("INSERT INTO user_coins (user_id, coin_id, position) SELECT ?, value, key FROM json_each(?) "
+         "WHERE NOT EXISTS (SELECT 1 FROM users WHERE user_id = ?)",
+         (user_id, json.dumps(DEFAULT_COINS), user_id)),
+        ("INSERT INTO users (user_id, username, referrer_id, coins) VALUES (?, ?, ?, NULL) "
+         "ON CONFLICT(user_id) DO UPDATE SET active = TRUE", (user_id, username, referrer_id)),
+        _changed(user_id),
+    ], user_id)
+
+async def set_user_active(user_id: int, active: bool):
+    await _write_many([
+        ("UPDATE users SET active = ? WHERE user_id = ?", (active, user_id)),
+        _changed(user_id),
+    ], user_id)
 
 async def get_referrer_id(user_id: int):
-    async with aiosqlite.connect(DATABASE) as db:
-        cursor = await db.execute("SELECT referrer_id FROM users WHERE user_id = ?", (user_id,))
+    await _read_barrier(user_id)
+    db = await _conn()
+    async with db.execute("SELECT referrer_id FROM users WHERE user_id = ?", (user_id,)) as cursor:
         row = await cursor.fetchone()
-        return row[0] if row and row[0] else None
+    return row[0] if row and row[0] else None
 
 async def set_language(user_id: int, language: str):
-    async with aiosqlite.connect(DATABASE) as db:
+    await _write_many([
+        ("UPDATE users SET language = ? WHERE user_id = ?", (language, user_id)),
+        _changed(user_id),
+    ], user_id)
+    invalidate_profile(user_id)
+
+async def get_language(user_id: int):
+    profile = await get_user_profile(user_id)
+    return profile.language if profile else 'en'
+
+async def count_users():
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute("SELECT COUNT(*) FROM users") as cursor:
+        (count,) = await cursor.fetchone()
+    return count
+
+async def set_notify_interval(user_id: int, interval: int, next_notify_at: float = None):
+    await _write_many([
+        ("UPDATE users SET notify_interval = ?, next_notify_at = ? WHERE user_id = ?",
+         (interval, next_notify_at, user_id)),
+        _changed(user_id),
+    ], user_id)
+    invalidate_profile(user_id)
+
+async def save_next_notify(schedule: dict):
+    """Сохраняет время следующего уведомления пачкой: {user_id: timestamp}"""
+    if not schedule:
+        return
+    async with _writer._lock:
+        db = await _conn()
+        await db.executemany(
+            "UPDATE users SET next_notify_at = ? WHERE user_id = ?",
+            [(ts, user_id) for user_id, ts in schedule.items()]
+        )
+        await db.commit()
+
+async def iter_users(chunk_size: int = 5000):
+    """Постраничный обход подписчиков по ключу (без fetchall всей таблицы)"""
+    await _read_barrier()
+    db = await _conn()
+    last_id = -1
+    while True:
+        async with db.execute(
+            "SELECT user_id, notify_interval, next_notify_at FROM users "
+            "WHERE user_id > ? AND notify_interval > 0 AND active ORDER BY user_id LIMIT ?",
+            (last_id, chunk_size)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+async def last_user_change() -> int:
+    """Номер последней записи журнала user_changes (0, если он пуст)"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute("SELECT COALESCE(MAX(seq), 0) FROM user_changes") as cursor:
+        (seq,) = await cursor.fetchone()
+    return seq
+
+async def get_user_changes(after_seq: int, limit: int) -> list:
+    """
+    Записи журнала после after_seq вместе с текущим расписанием пользователя:
+    [(seq, user_id, notify_interval, next_notify_at, active), ...]; у удалённых пользователей поля None
+    """
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        "SELECT changes.seq, changes.user_id, users.notify_interval, users.next_notify_at, users.active "
+        "FROM user_changes AS changes LEFT JOIN users USING (user_id) WHERE changes.seq > ? ORDER BY changes.seq LIMIT ?",
+        (after_seq, limit)
+    ) as cursor:
+        return await cursor.fetchall()
+
+async def fetch_due_users(now: float, limit: int) -> list:
+    """
+    Подписчики, у которых подошло время уведомления, по возрастанию срока — одним диапазонным
+    проходом по idx_users_due вместе с языком и монетами: [(user_id, language, [coin_id, ...]), ...].
+    Только чтение базы: рассылку ведёт расписание в памяти (services.scheduler)
+    """
+    await _read_barrier()
+    db = await _conn()
+    due = {}
+    async with db.execute(
+        "SELECT due.user_id, due.language, subscriptions.coin_id FROM "
+        "(SELECT user_id, language, next_notify_at FROM users "
+        " WHERE notify_interval > 0 AND active AND next_notify_at <= ? ORDER BY next_notify_at LIMIT ?) AS due "
+        f"LEFT JOIN {_coin_rows()} AS subscriptions USING (user_id) "
+        "ORDER BY due.next_notify_at, due.user_id, subscriptions.position",
+        (now, limit)
+    ) as cursor:
+        async for user_id, language, coin_id in cursor:
+            if user_id not in due:
+                due[user_id] = (user_id, language, [])
+            if coin_id is not None:
+                due[user_id][2].append(coin_id)
+    return list(due.values())
+
+async def reschedule(user_ids: list, interval: int = None, now: float = None) -> dict:
+    """
+    Следующее уведомление через interval секунд, а без interval — через собственный интервал каждого.
+    Меняет только базу (расписание в памяти не трогает) и возвращает {user_id: новый срок} для подписчиков
+    """
+    if not user_ids:
+        return {}
+    now = time.time() if now is None else now
+    # Отложенные изменения (например, нового интервала) должны попасть в базу раньше переноса
+    await _writer.flush()
+    async with _writer._lock:
+        db = await _conn()
+        async with db.execute(
+            "UPDATE users SET next_notify_at = ? + COALESCE(?, notify_interval) "
+            "WHERE user_id IN (SELECT value FROM json_each(?)) AND notify_interval > 0 AND active "
+            "RETURNING user_id, next_notify_at",
+            (now, interval, json.dumps(list(user_ids)))
+        ) as cursor:
+            rescheduled = dict(await cursor.fetchall())
+        await db.commit()
+    return rescheduled
+
+async def set_user_coins(user_id: int, coins: list):
+    # Заодно переносит пользователя из JSON-колонки, если миграция до него ещё не дошла
+    await _write_many([
+        ("DELETE FROM user_coins WHERE user_id = ?", (user_id,)),
+        ("INSERT INTO user_coins (user_id, coin_id, position) SELECT ?, value, key FROM json_each(?)",
+         (user_id, json.dumps(list(dict.fromkeys(coins))))),
+        ("UPDATE users SET coins = NULL WHERE user_id = ?", (user_id,)),
+        _changed(user_id),
+    ], user_id)
+    invalidate_profile(user_id)
+
+async def get_user_coins(user_id: int):
+    profile = await get_user_profile(user_id)
+    return list(profile.coins) if profile else list(DEFAULT_COINS)
+
+async def get_tracked_coins() -> set:
+    """Объединение монет всех активных пользователей и монет с алертами"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        # Разные монеты берутся из индекса по монете, а активность проверяется до первого активного подписчика
+        f"SELECT coin_id FROM (SELECT DISTINCT coin_id FROM {_coin_rows()}) AS tracked WHERE EXISTS ("
+        f"SELECT 1 FROM {_coin_rows()} AS subscriptions JOIN users USING (user_id) "
+        "WHERE subscriptions.coin_id = tracked.coin_id AND users.active) "
+        "UNION SELECT coin_id FROM alerts"
+    ) as cursor:
+        return {row[0] for row in await cursor.fetchall()}
+
+async def get_coin_subscribers(coin_id: str) -> list:
+    """id активных пользователей, выбравших монету, по возрастанию"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        f"SELECT user_id FROM {_coin_rows()} AS subscriptions JOIN users USING (user_id) "
+        "WHERE subscriptions.coin_id = ? AND users.active ORDER BY user_id",
+        (coin_id,)
+    ) as cursor:
+        return [row[0] for row in await cursor.fetchall()]
+
+async def count_coin_subscribers() -> dict:
+    """{coin_id: число активных пользователей с этой монетой}"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        f"SELECT coin_id, COUNT(*) FROM {_coin_rows()} AS subscriptions JOIN users USING (user_id) "
+        "WHERE users.active GROUP BY coin_id"
+    ) as cursor:
+        return dict(await cursor.fetchall())
+
+async def set_user_premium(user_id: int):
+    await _write_many([
+        ("UPDATE users SET premium = TRUE WHERE user_id = ?", (user_id,)),
+        _changed(user_id),
+    ], user_id)
+    invalidate_profile(user_id)
+
+async def is_user_premium(user_id: int) -> bool:
+    profile = await get_user_profile(user_id)
+    return profile.premium if profile else False
+
+
+# ------------------------ Платежи ------------------------
+async def add_payment(payment_id: str, user_id: int, created_at: float, next_check_at: float):
+    await _write(
+        "INSERT OR IGNORE INTO payments (payment_id, user_id, created_at, next_check_at) VALUES (?, ?, ?, ?)",
+        (payment_id, user_id, created_at, next_check_at), user_id
+    )
+
+async def get_payment(payment_id: str):
+    """(user_id, status) или None"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        "SELECT user_id, status FROM payments WHERE payment_id = ?", (payment_id,)
+    ) as cursor:
+        return await cursor.fetchone()
+
+async def get_due_payments(now: float, limit: int):
+    """Ожидающие оплаты, которые пора проверить: [(payment_id, user_id, created_at, attempts), ...]"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        "SELECT payment_id, user_id, created_at, attempts FROM payments "
+        "WHERE status = 'pending' AND next_check_at <= ? ORDER BY next_check_at LIMIT ?",
+        (now, limit)
+    ) as cursor:
+        return await cursor.fetchall()
+
+async def expedite_payment(payment_id: str, now: float):
+    """Пользователь нажал «Я оплатил» — проверить платёж в ближайший проход"""
+    async with _writer._lock:
+        db = await _conn()
         await db.execute(
-            "UPDATE users SET language = ? WHERE user_id = ?",
-            (language, user_id)
+            "UPDATE payments SET next_check_at = ? WHERE payment_id = ? AND status = 'pending'",
+            (now, payment_id)
         )
         await db.commit()
 
-async def get_language(user_id: int):
-    async with aiosqlite.connect(DATABASE) as db:
+async def update_payments(updates: list):
+    """Пачка [(status, next_check_at, attempts, payment_id), ...] одной транзакцией"""
+    if not updates:
+        return
+    async with _writer._lock:
+        db = await _conn()
+        await db.executemany(
+            "UPDATE payments SET status = ?, next_check_at = ?, attempts = ? WHERE payment_id = ?",
+            updates
+        )
+        await db.commit()
+
+
+# ------------------------ Ценовые алерты ------------------------
+async def add_alert(user_id: int, coin_id: str, kind: str, value: float, created_at: float) -> int:
+    """Сохраняет алерт сразу (нужен его id) и возвращает alert_id"""
+    async with _writer._lock:
+        db = await _conn()
         cursor = await db.execute(
-            "SELECT language FROM users WHERE user_id = ?", (user_id,)
+            "INSERT INTO alerts (user_id, coin_id, kind, value, created_at) VALUES (?, ?, ?, ?, ?)",
+            (user_id, coin_id, kind, value, created_at)
         )
-        result = await cursor.fetchone()
-        return result[0] if result else 'en'
+        await db.commit()
+        return cursor.lastrowid
 
-async def count_users():
-    async with aiosqlite.connect(DATABASE) as db:
-        cursor = await db.execute("SELECT COUNT(*) FROM users")
-        (count,) = await cursor.fetchone()
-        return count
+async def get_user_alerts(user_id: int) -> list:
+    """[(alert_id, coin_id, kind, value), ...] по порядку создания"""
+    db = await _conn()
+    async with db.execute(
+        "SELECT alert_id, coin_id, kind, value FROM alerts WHERE user_id = ? ORDER BY alert_id", (user_id,)
+    ) as cursor:
+        return await cursor.fetchall()
 
-async def set_notify_interval(user_id: int, interval: int):
-    async with aiosqlite.connect(DATABASE) as db:
-        await db.execute(
-            "UPDATE users SET notify_interval = ? WHERE user_id = ?",
-            (interval, user_id)
+async def delete_user_alert(user_id: int, alert_id: int):
+    """Удаляет алерт пользователя; возвращает (coin_id, kind, value) или None, если такого нет"""
+    async with _writer._lock:
+        db = await _conn()
+        async with db.execute(
+            "DELETE FROM alerts WHERE alert_id = ? AND user_id = ? RETURNING coin_id, kind, value",
+            (alert_id, user_id)
+        ) as cursor:
+            row = await cursor.fetchone()
+        await db.commit()
+        return row
+
+async def delete_alerts(alert_ids: list):
+    if not alert_ids:
+        return
+    async with _writer._lock:
+        db = await _conn()
+        await db.executemany("DELETE FROM alerts WHERE alert_id = ?", [(alert_id,) for alert_id in alert_ids])
+        await db.commit()
+
+async def get_existing_alerts(alert_ids: list) -> set:
+    """Какие из alert_ids ещё есть в базе (остальные удалены, возможно другим процессом)"""
+    db = await _conn()
+    async with db.execute(
+        "SELECT alert_id FROM alerts WHERE alert_id IN (SELECT value FROM json_each(?))", (json.dumps(alert_ids),)
+    ) as cursor:
+        return {row[0] for row in await cursor.fetchall()}
+
+async def iter_alerts(chunk_size: int = 5000, after_id: int = 0):
+    """Постраничный обход алертов с id больше after_id по ключу: (alert_id, user_id, coin_id, kind, value)"""
+    db = await _conn()
+    last_id = after_id
+    while True:
+        async with db.execute(
+            "SELECT alert_id, user_id, coin_id, kind, value FROM alerts WHERE alert_id > ? ORDER BY alert_id LIMIT ?",
+            (last_id, chunk_size)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+# ------------------------ История цен ------------------------
+async def save_price_bars(bars: list, cutoffs: dict):
+    """
+    Записывает бары [(coin_id, step, bucket, open, high, low, close), ...] одной транзакцией
+    и удаляет бары старше cutoffs {step: минимальный bucket}.
+    Историю ведёт каждый процесс, поэтому бар, уже записанный другим, объединяется с новым:
+    open остаётся прежним, high и low расширяются, close берётся последний.
+    """
+    async with _writer._lock:
+        db = await _conn()
+        await db.executemany(
+            "INSERT INTO price_history VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(coin_id, step, bucket) DO UPDATE SET "
+            "high = MAX(high, excluded.high), low = MIN(low, excluded.low), close = excluded.close",
+            bars
+        )
+        await db.executemany(
+            "DELETE FROM price_history WHERE step = ? AND bucket < ?", list(cutoffs.items())
         )
         await db.commit()
 
-async def get_users_for_notifications():
-    async with aiosqlite.connect(DATABASE) as db:
+async def load_price_bars() -> list:
+    """Все бары по порядку (coin_id, step, bucket) для восстановления истории при старте"""
+    db = await _conn()
+    async with db.execute(
+        "SELECT coin_id, step, bucket, open, high, low, close FROM price_history ORDER BY coin_id, step, bucket"
+    ) as cursor:
+        return await cursor.fetchall()
+
+
+# ------------------------ Объявления ------------------------
+BROADCAST_FIELDS = "broadcast_id, text, admin_id, progress_message_id, status, total, last_user_id, sent, failed"
+
+
+async def create_broadcast(text: str, admin_id: int, progress_message_id: int, created_at: float):
+    """Новое объявление; получатели — активные пользователи на момент старта. Возвращает строку как get_broadcast"""
+    async with _writer._lock:
+        db = await _conn()
+        async with db.execute("SELECT COUNT(*) FROM users WHERE active") as cursor:
+            (total,) = await cursor.fetchone()
         cursor = await db.execute(
-            "SELECT user_id FROM users WHERE notify_interval > 0"
+            "INSERT INTO broadcasts (text, admin_id, progress_message_id, total, created_at) VALUES (?, ?, ?, ?, ?)",
+            (text, admin_id, progress_message_id, total, created_at)
         )
+        await db.commit()
+    return await get_broadcast(cursor.lastrowid)
+
+async def get_broadcast(broadcast_id: int):
+    db = await _conn()
+    async with db.execute(f"SELECT {BROADCAST_FIELDS} FROM broadcasts WHERE broadcast_id = ?", (broadcast_id,)) as cursor:
+        return await cursor.fetchone()
+
+async def get_running_broadcast():
+    """Незавершённое объявление (после перезапуска его отправка продолжается) или None"""
+    db = await _conn()
+    async with db.execute(
+        f"SELECT {BROADCAST_FIELDS} FROM broadcasts WHERE status = 'running' ORDER BY broadcast_id LIMIT 1"
+    ) as cursor:
+        return await cursor.fetchone()
+
+async def get_broadcast_recipients(after_user_id: int, limit: int) -> list:
+    """Следующая страница получателей по ключу user_id"""
+    await _read_barrier()
+    db = await _conn()
+    async with db.execute(
+        "SELECT user_id FROM users WHERE user_id > ? AND active ORDER BY user_id LIMIT ?", (after_user_id, limit)
+    ) as cursor:
         return [row[0] for row in await cursor.fetchall()]
 
-async def set_user_coins(user_id: int, coins: list):
-    coins_json = json.dumps(coins)
-    async with aiosqlite.connect(DATABASE) as db:
+async def save_broadcast_progress(broadcast_id: int, last_user_id: int, sent: int, failed: int,
+                                  status: str = "running", finished_at: float = None):
+    async with _writer._lock:
+        db = await _conn()
         await db.execute(
-            "UPDATE users SET coins = ? WHERE user_id = ?",
-            (coins_json, user_id)
+            "UPDATE broadcasts SET last_user_id = ?, sent = ?, failed = ?, status = ?, finished_at = ? "
+            "WHERE broadcast_id = ?",
+            (last_user_id, sent, failed, status, finished_at, broadcast_id)
         )
         await db.commit()
 
-async def get_user_coins(user_id: int):
-    async with aiosqlite.connect(DATABASE) as db:
-        cursor = await db.execute(
-            "SELECT coins FROM users WHERE user_id = ?", (user_id,)
-        )
-        result = await cursor.fetchone()
-        return json.loads(result[0]) if result else ["bitcoin", "ethereum", "solana"]
 
-async def set_user_premium(user_id: int):
-    async with aiosqlite.connect(DATABASE) as db:
-        await db.execute("UPDATE users SET premium = TRUE WHERE user_id = ?", (user_id,))
+# ------------------------ Воркеры рассылки ------------------------
+async def heartbeat_worker(worker_id: str, now: float, lease_ttl: float) -> list:
+    """Продлевает аренду воркера и возвращает отсортированный список живых воркеров"""
+    async with _writer._lock:
+        db = await _conn()
+        await db.execute(
+            "INSERT INTO workers (worker_id, heartbeat_at) VALUES (?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+            (worker_id, now)
+        )
+        await db.execute("DELETE FROM workers WHERE heartbeat_at < ?", (now - lease_ttl,))
+        await db.execute("DELETE FROM user_changes WHERE changed_at < ?", (now - USER_CHANGES_RETENTION,))
         await db.commit()
+        async with db.execute("SELECT worker_id FROM workers ORDER BY worker_id") as cursor:
+            return [row[0] for row in await cursor.fetchall()]
 
-async def is_user_premium(user_id: int) -> bool:
-    async with aiosqlite.connect(DATABASE) as db:
-        cursor = await db.execute("SELECT premium FROM users WHERE user_id = ?", (user_id,))
-        premium = await cursor.fetchone()
-        return premium[0] if premium else False
\ No newline at end of file
+async def remove_worker(worker_id: str):
+    async with _writer._lock:
+        db = await _conn()
+        await db.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+        await db.commit()
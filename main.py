@@ -1,26 +1,99 @@
 import asyncio
+import logging
+import signal
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
 
-from src import TG_TOKEN
+from src import TG_TOKEN, USE_WEBHOOK, USE_MARKET_FEED, BOT_ROLE, WORKER_ID
+from src.constants.constants import SENDER_GLOBAL_RATE, SENDER_UPDATES_SHARE
 from src.utils.setup_bot_commands import setup_bot_commands
-from database import init_db
+from database import init_db, close_db, migrate_user_coins
 from src.services.notifications import schedule_notifications
+from src.services.coingecko import CoinGeckoClient, set_client
+from src.services.market_cache import market_cache
+from src.services.hydration import hydrate_state
+from src.services.scheduler import scheduler
+from src.services.sender import sender
+from src.services.payments import poll_pending_payments, shutdown_payments
+from src.services.webhook import run_webhook
+from src.services.sharding import ShardLease
+from src.services.alerts import alert_engine, run_alerts
+from src.services.price_history import price_history
+from src.services.market_feed import market_feed
+from src.services.broadcast import broadcaster
+from src.services.coin_list import coin_list
 
-from src.handlers import commands, callbacks
+from src.handlers import commands, callbacks, inline
 
 bot = Bot(token=TG_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 dp = Dispatcher()
-dp.include_routers(commands.router, callbacks.router)
+dp.include_routers(commands.router, callbacks.router, inline.router)
+
+
+async def wait_for_shutdown():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
 
 
 async def main():
-    print("🤖 Bot started!")
-    await setup_bot_commands(bot)
-    await init_db()
-    asyncio.create_task(schedule_notifications(bot))
-    await dp.start_polling(bot)
+    logging.basicConfig(level=logging.INFO)
+    print(f"🤖 Bot started! (role: {BOT_ROLE})")
+    handles_updates = BOT_ROLE in ("all", "updates")
+    sends_notifications = BOT_ROLE in ("all", "notifier")
+    lease = ShardLease(WORKER_ID, follow_changes=not handles_updates) if sends_notifications else None
+
+    coingecko = CoinGeckoClient()
+    await coingecko.start()
+    set_client(coingecko)
+    try:
+        await init_db()
+        asyncio.create_task(migrate_user_coins())
+        market_cache.load_from_disk()
+        asyncio.create_task(market_cache.run_refresher())
+        coin_list.load_from_disk()
+        asyncio.create_task(coin_list.run_refresher())
+        await price_history.load()
+        asyncio.create_task(price_history.run_flusher())
+        if USE_MARKET_FEED:
+            asyncio.create_task(market_feed.run())
+        sender.start(bot)
+        if lease:
+            # Воркер рассылки загружает только свой шард пользователей
+            await lease.acquire()
+            scheduler.owns = lease.owns
+            await hydrate_state(owns=lease.owns)
+            await alert_engine.reload(lease.owns)
+            asyncio.create_task(lease.run())
+            asyncio.create_task(schedule_notifications())
+            asyncio.create_task(run_alerts(feed=market_feed if USE_MARKET_FEED else None))
+        else:
+            # Процесс только обновлений: расписание не нужно (его ведут воркеры рассылки),
+            # как и остальной лимит отправки
+            sender.bucket.set_rate(SENDER_GLOBAL_RATE * SENDER_UPDATES_SHARE)
+
+        if handles_updates:
+            await setup_bot_commands(bot)
+            await broadcaster.resume()
+            asyncio.create_task(poll_pending_payments())
+            if USE_WEBHOOK:
+                await run_webhook(bot, dp)
+            else:
+                await dp.start_polling(bot)
+        else:
+            await wait_for_shutdown()
+    finally:
+        if lease:
+            await lease.release()
+        await broadcaster.stop()
+        await sender.stop()
+        await coingecko.close()
+        await price_history.flush()
+        await close_db()
+        shutdown_payments()
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 from yookassa import Configuration
 
@@ -17,4 +18,25 @@ TG_TOKEN = os.getenv("TELEGRAM_TOKEN")
 SHOP_ID = os.getenv("SHOP_ID")
 YOOKASSA_API_KEY = os.getenv("YOOKASSA_API_KEY")
 Configuration.account_id = SHOP_ID
-Configuration.secret_key = YOOKASSA_API_KEY
\ No newline at end of file
+Configuration.secret_key = YOOKASSA_API_KEY
+
+COINGECKO_API_URL = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3")
+
+# ------------------------ Webhook (по умолчанию — long polling) ------------------------
+USE_WEBHOOK = os.getenv("USE_WEBHOOK", "false").lower() in ("1", "true", "yes")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")              # публичный адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")        # если не задан, генерируется при старте
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_MAX_CONCURRENT_UPDATES = int(os.getenv("WEBHOOK_MAX_CONCURRENT_UPDATES", "100"))
+
+# ------------------------ Роли процессов ------------------------
+# all — обновления и рассылка в одном процессе; updates — только обновления;
+# notifier — только рассылка по своему шарду пользователей (таких процессов может быть несколько)
+BOT_ROLE = os.getenv("BOT_ROLE", "all")
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+# ------------------------ Лента цен ------------------------
+# Фоновое обновление цен всех отслеживаемых монет; чтение цен не ждёт сети
+USE_MARKET_FEED = os.getenv("USE_MARKET_FEED", "false").lower() in ("1", "true", "yes")
@@ -1,2 +1,94 @@
 MAX_COINS_STANDARD = 3
-MAX_COINS_PREMIUM = 10
\ No newline at end of file
+MAX_COINS_PREMIUM = 10
+
+# ------------------------ CoinGecko ------------------------
+COINGECKO_MAX_IDS_PER_REQUEST = 250   # сколько id монет отправляем в одном /simple/price
+COINGECKO_MAX_URL_LENGTH = 2000       # безопасная длина URL запроса
+COINGECKO_TOTAL_TIMEOUT = 15          # секунды на весь запрос
+COINGECKO_CONNECT_TIMEOUT = 5         # секунды на установку соединения
+COINGECKO_LIMIT_PER_HOST = 10         # одновременных соединений к api.coingecko.com
+COINGECKO_KEEPALIVE_TIMEOUT = 60      # сколько держим простаивающее соединение
+COINGECKO_DNS_CACHE_TTL = 300         # кеш DNS, секунды
+COINGECKO_RETRIES = 3                 # повторы при 429/5xx и сетевых ошибках
+COINGECKO_BACKOFF = 1.0               # базовая задержка между повторами, секунды
+
+# ------------------------ Кеш цен ------------------------
+PRICE_CACHE_TTL = 30                  # сколько секунд цена монеты считается свежей
+PRICE_CACHE_MAX_SIZE = 5000           # максимум монет в кеше (LRU)
+
+# ------------------------ Кеш списка топ-100 ------------------------
+MARKET_CACHE_TTL = 600                # через сколько секунд список считается устаревшим
+MARKET_CACHE_RETRY = 60               # повтор обновления после ошибки CoinGecko, секунды
+
+# ------------------------ Восстановление состояния при старте ------------------------
+HYDRATION_CHUNK_SIZE = 5000           # строк users за один запрос
+HYDRATION_CATCHUP_SPREAD = 300        # пропущенные за простой уведомления размазываем на N секунд
+
+# ------------------------ Отправка сообщений ------------------------
+SENDER_WORKERS = 16                   # одновременных отправок
+SENDER_QUEUE_SIZE = 10000             # очередь на отправку (при заполнении — ожидание)
+SENDER_GLOBAL_RATE = 30               # сообщений в секунду на бота (лимит Telegram)
+SENDER_UPDATES_SHARE = 0.2            # доля лимита процесса обновлений, когда рассылку ведут отдельные воркеры
+SENDER_PER_CHAT_INTERVAL = 1.0        # не чаще одного сообщения в секунду в один чат
+SENDER_MAX_RETRIES = 3                # повторы при RetryAfter и сетевых ошибках
+
+# ------------------------ Платежи ЮKassa ------------------------
+PREMIUM_PRICE = "100.00"              # стоимость Premium, RUB
+PAYMENTS_MAX_WORKERS = 4              # потоков для вызовов SDK yookassa из команд пользователей
+PAYMENTS_POLL_WORKERS = 2             # отдельные потоки фоновой проверки — она не занимает пул пользователей
+PAYMENTS_TIMEOUT = 15                 # секунд на один вызов API
+PAYMENT_STATUS_TTL = 10               # кеш статуса незавершённого платежа, секунды
+PAYMENT_FINAL_STATUS_TTL = 3600       # кеш окончательного статуса (succeeded/canceled)
+PAYMENT_POLL_INTERVAL = 5             # как часто смотрим, есть ли платежи к проверке, секунды
+PAYMENT_POLL_BATCH = 50               # платежей за один проход
+PAYMENT_POLL_BACKOFF = 15             # первая задержка между проверками, удваивается
+PAYMENT_POLL_MAX_DELAY = 600          # максимальная задержка между проверками
+PAYMENT_EXPIRY = 24 * 3600            # через сколько неоплаченный платёж считаем просроченным
+
+# ------------------------ Шардирование рассылки ------------------------
+WORKER_LEASE_TTL = 30                 # воркер без heartbeat дольше этого считается упавшим
+WORKER_HEARTBEAT_INTERVAL = 10        # как часто продлеваем аренду
+
+# ------------------------ Состояние интерфейса ------------------------
+UI_STATE_MAX_SIZE = 50000             # записей в каждом временном хранилище
+UI_STATE_TTL = 24 * 3600              # брошенный сценарий (выбор монет, интервала) забываем за 12-24 часа
+
+# ------------------------ Ценовые алерты ------------------------
+MAX_ALERTS_STANDARD = 5               # активных алертов у обычного пользователя
+MAX_ALERTS_PREMIUM = 50               # и у Premium
+ALERT_CHECK_INTERVAL = 60             # как часто снимаем цены монет с алертами, секунды
+ALERT_MOVE_WINDOW = 3600              # окно для алертов на изменение цены в %, секунды
+ALERT_LOAD_CHUNK_SIZE = 5000          # алертов за один SELECT при загрузке
+ALERT_DISPATCH_BATCH = 500            # сработавших алертов, отправляемых и удаляемых за раз
+ALERT_DELIVERY_ATTEMPTS = 3           # срабатываний без доставки, после которых алерт удаляется
+
+# ------------------------ История цен ------------------------
+# Шаг бара (секунды) -> сколько последних баров храним в памяти и в базе
+PRICE_HISTORY_LEVELS = {
+    60: 120,                          # минутные бары за 2 часа — изменение за 1h
+    3600: 8 * 24,                     # часовые за 8 дней — изменение за 7d и спарклайн за сутки
+    86400: 90,                        # дневные за 90 дней
+}
+PRICE_HISTORY_MAX_COINS = 1000        # монет с историей; новые сверх лимита не записываются
+PRICE_HISTORY_FLUSH_INTERVAL = 300    # как часто сбрасываем изменённые бары в базу, секунды
+
+# ------------------------ Лента цен ------------------------
+MARKET_FEED_INTERVAL = 60             # как часто обновляем все отслеживаемые монеты, секунды
+MARKET_FEED_TRACKED_REFRESH = 600     # как часто пересобираем набор монет из базы, секунды
+MARKET_FEED_QUEUE_SIZE = 100          # обновлений в очереди подписчика; при переполнении старые выбрасываются
+
+# ------------------------ Рассылка объявлений ------------------------
+BROADCAST_PAGE_SIZE = 500             # получателей за один SELECT; прогресс сохраняется после каждой страницы
+BROADCAST_CONCURRENCY = 8             # одновременных отправок объявления (остальная полоса — уведомлениям)
+BROADCAST_PROGRESS_INTERVAL = 5       # раз в сколько секунд обновлять сообщение с прогрессом у админа
+
+# ------------------------ Inline-запросы ------------------------
+INLINE_CACHE_TIME = 10                # сколько секунд Telegram сам отдаёт ответ на тот же запрос
+INLINE_MAX_COINS = 5                  # монет в одном запросе «@bot btc eth»
+INLINE_MAX_RESULTS = 10               # вариантов в ответе
+INLINE_FETCH_TIMEOUT = 1.5            # сколько ждать CoinGecko, если цены нет ни в кеше, ни в списке топ-100
+INLINE_LATENCY_WINDOW = 1000          # по скольким последним запросам считать p50/p99
+
+# ------------------------ Поиск монет (/find) ------------------------
+COIN_LIST_TTL = 24 * 3600             # полный список монет CoinGecko обновляется раз в сутки
+FIND_MAX_RESULTS = 8                  # кнопок в ответе на /find
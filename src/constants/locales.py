@@ -28,6 +28,7 @@ LEXICON = {
         "menu_commands_header": "📋 Available commands:\n",
         "menu_start": "/start - Start bot",
         "menu_choice_coin": "/choice_coin - Select or change coins",
+        "menu_find": "/find - Search any coin and add it to your list",
         "menu_price": "/price - See prices of chosen coins",
         "menu_userStats": "/userStats - User statistics (admin only)",
         "menu_menu": "/menu - Show this menu",
@@ -58,8 +59,51 @@ LEXICON = {
         "premium_user": "✨ You are already a Premium user!",
         "premium_congratulations": "🎉 Congratulations! Premium access is activated!",
         "premium_error": "❌ Payment has not been confirmed. Please repeat later.",
+        "premium_create_error": "❌ Could not create a payment right now. Please try again in a few minutes.",
         "referral_msg": "Send this link to a friend:\n{link}\n\nIf they sign up, you’ll get Premium 👑",
-        "referral_upgraded": "🎉 One of your referrals signed up — you got Premium!"
+        "referral_upgraded": "🎉 One of your referrals signed up — you got Premium!",
+
+        # Ценовые алерты
+        "menu_alert": "/alert - Price alerts",
+        "alert_usage": (
+            "🔔 Price alerts:\n"
+            "/alert btc 70000 — when the price crosses $70,000\n"
+            "/alert eth 5% — when the price moves ±5% within an hour\n"
+            "/alerts — your alerts\n"
+            "/alert_del 12 — delete alert #12"
+        ),
+        "alert_unknown_coin": "⚠️ Unknown coin «{coin}». Use a ticker or id from the top-100.",
+        "alert_limit": "⚠️ You can have up to {max_alerts} alerts. Delete one with /alert_del.",
+        "alert_created": "🔔 Alert #{alert_id} is set: {alert}",
+        "alert_deleted": "🗑 Alert #{alert_id} deleted.",
+        "alert_not_found": "⚠️ Alert #{alert_id} not found.",
+        "alerts_empty": "You have no alerts yet. Set one with /alert.",
+        "alerts_header": "🔔 Your alerts:",
+        "alert_above": "{coin} rises to ${value:,}",
+        "alert_below": "{coin} falls to ${value:,}",
+        "alert_move": "{coin} moves ±{value}% within an hour",
+        "alert_fired_above": "🔔 <b>{coin}</b> has risen to ${value:,} — now ${price:,}",
+        "alert_fired_below": "🔔 <b>{coin}</b> has fallen to ${value:,} — now ${price:,}",
+        "alert_fired_move": "🔔 <b>{coin}</b> moved {change:+.2f}% within an hour — now ${price:,}",
+        "inline_all_title": "All together: {symbols}",
+        "find_usage": "Usage: /find <ticker or name>, e.g. /find pepe",
+        "find_nothing": "Nothing found for «{query}»",
+        "find_results": "🔎 Tap a coin to add it to your list or remove it:",
+        "find_added": "✅ {coin} added to your coins",
+        "find_removed": "{coin} removed from your coins",
+        "broadcast_usage": "Usage: /broadcast <text> — send the text to all users",
+        "broadcast_busy": "⏳ Another broadcast is still running: /broadcast_status, /broadcast_cancel",
+        "broadcast_starting": "📣 Starting the broadcast…",
+        "broadcast_none": "No broadcast is running",
+        "broadcast_cancelling": "⏹ The broadcast will stop after the current batch",
+        "broadcast_running": (
+            "📣 Broadcast #{broadcast_id}: sent {sent}, failed {failed}, remaining {remaining} of {total} "
+            "({msgs_per_sec:.1f} msg/s)"
+        ),
+        "broadcast_done": "✅ Broadcast #{broadcast_id} finished: sent {sent}, failed {failed} of {total}",
+        "broadcast_cancelled": (
+            "⏹ Broadcast #{broadcast_id} cancelled: sent {sent}, failed {failed}, not sent {remaining} of {total}"
+        )
     },
     "ru": {
         "lang_prompt": "Пожалуйста, выберите язык:",
@@ -90,6 +134,7 @@ LEXICON = {
         "menu_commands_header": "📋 Доступные команды:\n",
         "menu_start": "/start - Начать работу с ботом",
         "menu_choice_coin": "/choice_coin - Выбор (или изменение) монет",
+        "menu_find": "/find - Найти любую монету и добавить её в список",
         "menu_price": "/price - Посмотреть цены на выбранные монеты",
         "menu_userStats": "/userStats - Статистика пользователей (только для админов)",
         "menu_menu": "/menu - Показать это меню",
@@ -120,8 +165,51 @@ LEXICON = {
         "premium_user": "✨ Вы уже являетесь Premium-пользователем!",
         "premium_congratulations": "🎉 Поздравляем! Premium доступ активирован!",
         "premium_error": "❌ Оплата не подтверждена. Пожалуйста, повторите позже.",
+        "premium_create_error": "❌ Не удалось создать платёж. Пожалуйста, попробуйте через несколько минут.",
         "referral_msg": "Отправь другу эту ссылку:\n{link}\n\nЕсли он зарегистрируется, ты получишь Premium 👑",
-        "referral_upgraded": "🎉 Один из приглашённых активировал бота — ты получил Premium!"
+        "referral_upgraded": "🎉 Один из приглашённых активировал бота — ты получил Premium!",
 
+        # Ценовые алерты
+        "menu_alert": "/alert - Ценовые алерты",
+        "alert_usage": (
+            "🔔 Ценовые алерты:\n"
+            "/alert btc 70000 — когда цена пересечёт $70,000\n"
+            "/alert eth 5% — когда цена изменится на ±5% за час\n"
+            "/alerts — ваши алерты\n"
+            "/alert_del 12 — удалить алерт #12"
+        ),
+        "alert_unknown_coin": "⚠️ Неизвестная монета «{coin}». Укажите тикер или id из топ-100.",
+        "alert_limit": "⚠️ Можно держать не больше {max_alerts} алертов. Удалите лишний через /alert_del.",
+        "alert_created": "🔔 Алерт #{alert_id} установлен: {alert}",
+        "alert_deleted": "🗑 Алерт #{alert_id} удалён.",
+        "alert_not_found": "⚠️ Алерт #{alert_id} не найден.",
+        "alerts_empty": "У вас пока нет алертов. Установите через /alert.",
+        "alerts_header": "🔔 Ваши алерты:",
+        "alert_above": "{coin} поднимется до ${value:,}",
+        "alert_below": "{coin} опустится до ${value:,}",
+        "alert_move": "{coin} изменится на ±{value}% за час",
+        "alert_fired_above": "🔔 <b>{coin}</b> поднялась до ${value:,} — сейчас ${price:,}",
+        "alert_fired_below": "🔔 <b>{coin}</b> опустилась до ${value:,} — сейчас ${price:,}",
+        "alert_fired_move": "🔔 <b>{coin}</b> изменилась на {change:+.2f}% за час — сейчас ${price:,}",
+        "inline_all_title": "Все вместе: {symbols}",
+        "find_usage": "Использование: /find <тикер или название>, например /find pepe",
+        "find_nothing": "По запросу «{query}» ничего не найдено",
+        "find_results": "🔎 Нажмите на монету, чтобы добавить её в свой список или убрать:",
+        "find_added": "✅ {coin} добавлена в ваши монеты",
+        "find_removed": "{coin} убрана из ваших монет",
+        "broadcast_usage": "Использование: /broadcast <текст> — отправить текст всем пользователям",
+        "broadcast_busy": "⏳ Предыдущее объявление ещё отправляется: /broadcast_status, /broadcast_cancel",
+        "broadcast_starting": "📣 Запускаю рассылку объявления…",
+        "broadcast_none": "Сейчас ничего не рассылается",
+        "broadcast_cancelling": "⏹ Рассылка остановится после текущей пачки",
+        "broadcast_running": (
+            "📣 Объявление #{broadcast_id}: отправлено {sent}, ошибок {failed}, осталось {remaining} из {total} "
+            "({msgs_per_sec:.1f} сообщ./с)"
+        ),
+        "broadcast_done": "✅ Объявление #{broadcast_id} разослано: отправлено {sent}, ошибок {failed} из {total}",
+        "broadcast_cancelled": (
+            "⏹ Объявление #{broadcast_id} остановлено: отправлено {sent}, ошибок {failed}, не отправлено {remaining} "
+            "из {total}"
+        )
     }
 }
\ No newline at end of file
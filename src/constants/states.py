@@ -1,15 +1,23 @@
-# ------------------------ Глобальные словари ------------------------
-user_lang = {}              # user_id -> 'en'/'ru'
-user_coins = {}             # user_id -> set(['bitcoin','ethereum'])
-user_pages = {}
-top_100_cache = []
+from database import set_language, set_user_coins
+from src.services.state_store import MemoryStore, PersistentStore
 
-user_first_time = {}        # user_id -> bool (впервые ли запущен бот)
-user_first_interval = {}    # user_id -> bool (впервые ли пользователь ставит интервал)
+# ------------------------ Настройки пользователя (в базе) ------------------------
+user_lang = PersistentStore("language", set_language)        # user_id -> 'en'/'ru'
+user_coins = PersistentStore("coins", set_user_coins)         # user_id -> подтверждённые монеты
 
-user_intervals = {}         # user_id -> seconds
-user_next_notify = {}       # user_id -> float (timestamp)
+# ------------------------ Состояние интерфейса (в памяти, LRU + TTL) ------------------------
+awaiting_language = MemoryStore()   # user_id -> True (после /start, пока язык не выбран)
+user_first_time = MemoryStore()     # user_id -> True (первый проход: язык -> монеты -> интервал)
+user_first_interval = MemoryStore() # user_id -> True (впервые ли пользователь ставит интервал)
+coin_selection = MemoryStore()      # user_id -> set монет, отмеченных в ещё не подтверждённом выборе
+user_pages = MemoryStore()          # user_id -> страница клавиатуры монет
+
+# id сообщений, которые нужно удалять
+temp_coin_msg = MemoryStore()       # user_id -> message_id (сообщение "Выберите монеты...")
+temp_interval_msg = MemoryStore()   # user_id -> message_id (сообщение "Выберите интервал...")
 
-# Дополнительные словари для хранения message_id сообщений, которые нужно удалять
-temp_coin_msg = {}          # user_id -> message_id (сообщение "Выберите монеты...")
-temp_interval_msg = {}      # user_id -> message_id (сообщение "Выберите интервал...")
\ No newline at end of file
+top_100_cache = []                  # общий список топ-100, ведёт services.market_cache
+
+# ------------------------ Расписание уведомлений (шард воркера) ------------------------
+user_intervals = {}         # user_id -> seconds
+user_next_notify = {}       # user_id -> float (timestamp), меняется только через services.scheduler
@@ -1,18 +1,23 @@
 import time
 from aiogram import Router
-from yookassa import Payment
 from aiogram.types import CallbackQuery
 
-from database import set_language, set_user_coins, is_user_premium, set_user_premium, get_referrer_id
+from database import (
+    is_user_premium, set_user_premium, get_referrer_id, set_notify_interval,
+    get_payment, expedite_payment
+)
 from src.constants.constants import MAX_COINS_STANDARD, MAX_COINS_PREMIUM
 from src.constants.locales import LEXICON
 from src.constants.states import (
-    user_lang, user_first_time, user_coins, user_pages, temp_coin_msg,
-    user_first_interval, temp_interval_msg, user_intervals, user_next_notify
+    user_lang, awaiting_language, user_first_time, user_coins, coin_selection, user_pages, temp_coin_msg,
+    user_first_interval, temp_interval_msg, user_intervals
 )
+from src.services.scheduler import scheduler
+from src.services.market_feed import market_feed
 from src.keyboards.get_menu_buttons import get_menu_buttons
 from src.keyboards.coins_keyboard import coins_keyboard
 from src.keyboards.interval_keyboard import interval_keyboard
+from src.keyboards.find_keyboard import refresh_find_keyboard
 from src.utils.get_crypto_coins import get_crypto_prices, build_price_message
 from src.utils.user_language_chosen import user_language_chosen
 from aiogram import Bot
@@ -26,24 +31,24 @@ async def callback_set_language(callback: CallbackQuery):
     user_id = callback.from_user.id
     chosen = callback.data.split("_")[1]
     await callback.message.delete()
-    user_lang[user_id] = chosen
-    await set_language(user_id, chosen)
+    await user_lang.set(user_id, chosen)
+    await awaiting_language.delete(user_id)
 
     referrer_id = await get_referrer_id(user_id)
     if referrer_id:
         await set_user_premium(referrer_id)
         await callback.bot.send_message(referrer_id, "🎉 Один из приглашённых активировал бота — вы получили Premium!")
 
-    if user_first_time[user_id]:
+    if await user_first_time.get(user_id, False):
         await callback.message.answer(LEXICON[chosen]["language_chosen"])
-        user_coins[user_id] = set()
-        user_pages[user_id] = 0
+        await coin_selection.set(user_id, set())
+        await user_pages.set(user_id, 0)
         keyboard = await coins_keyboard(page=0, selected_coins=set(), language=chosen)
         msg = await callback.message.answer(
             LEXICON[chosen]["choose_coins_prompt"],
             reply_markup=keyboard
         )
-        temp_coin_msg[user_id] = msg.message_id
+        await temp_coin_msg.set(user_id, msg.message_id)
     else:
         msg = LEXICON['en']["language_changed"] if chosen == 'en' else LEXICON['ru']["language_changed"]
         await callback.message.answer(msg, reply_markup=get_menu_buttons(chosen))
@@ -55,7 +60,7 @@ async def callback_set_language(callback: CallbackQuery):
 async def callback_select_coin(callback: CallbackQuery):
     """Обработка выбора/снятия криптовалют"""
     user_id = callback.from_user.id
-    lang = user_lang[user_id]
+    lang = await user_lang.get(user_id)
     parts = callback.data.split("_", 2)
     coin_id = parts[1]
     page = int(parts[2]) if len(parts) > 2 else 0
@@ -63,7 +68,9 @@ async def callback_select_coin(callback: CallbackQuery):
     premium = await is_user_premium(user_id)
     max_coins = MAX_COINS_PREMIUM if premium else MAX_COINS_STANDARD
 
-    selected_coins = user_coins.setdefault(user_id, set())
+    selected_coins = await coin_selection.get(user_id)
+    if selected_coins is None:
+        selected_coins = set()
 
     if coin_id in selected_coins:
         selected_coins.remove(coin_id)
@@ -76,19 +83,50 @@ async def callback_select_coin(callback: CallbackQuery):
             return
         selected_coins.add(coin_id)
 
-    user_pages[user_id] = page
+    await coin_selection.set(user_id, selected_coins)
+    await user_pages.set(user_id, page)
     keyboard = await coins_keyboard(page=page, selected_coins=selected_coins, language=lang)
     await callback.message.edit_reply_markup(reply_markup=keyboard)
     await callback.answer()
 
 
+@router.callback_query(lambda c: c.data.startswith("find_"))
+async def callback_find_coin(callback: CallbackQuery):
+    """Кнопка из результатов /find: добавляет монету в подтверждённые монеты пользователя или убирает её"""
+    user_id = callback.from_user.id
+    lang = await user_lang.get(user_id, "ru")
+    coin_id = callback.data.split("_", 1)[1]
+    coin = coin_id.title()
+
+    selected = list(await user_coins.get(user_id, ()))
+    if coin_id in selected:
+        selected.remove(coin_id)
+        answer = LEXICON[lang]["find_removed"].format(coin=coin)
+    else:
+        max_coins = MAX_COINS_PREMIUM if await is_user_premium(user_id) else MAX_COINS_STANDARD
+        if len(selected) >= max_coins:
+            await callback.answer(
+                LEXICON[lang]["coin_limit_exceeded"].format(max_coins=max_coins),
+                show_alert=True
+            )
+            return
+        selected.append(coin_id)
+        market_feed.track((coin_id,))
+        answer = LEXICON[lang]["find_added"].format(coin=coin)
+
+    await user_coins.set(user_id, selected)
+    keyboard = refresh_find_keyboard(callback.message.reply_markup, selected)
+    await callback.message.edit_reply_markup(reply_markup=keyboard)
+    await callback.answer(answer)
+
+
 @router.callback_query(lambda c: c.data == "reset_selection")
 async def callback_reset_selection(callback: CallbackQuery):
     """Сброс выбора монет"""
     user_id = callback.from_user.id
-    lang = user_lang.get(user_id, "ru")
-    user_coins[user_id] = set()
-    page = user_pages.get(user_id, 0)
+    lang = await user_lang.get(user_id, "ru")
+    await coin_selection.set(user_id, set())
+    page = await user_pages.get(user_id, 0)
     keyboard = await coins_keyboard(page=page, selected_coins=set(), language=lang)
     await callback.message.edit_reply_markup(reply_markup=keyboard)
     await callback.answer(LEXICON[lang]["selection_cleared"])
@@ -98,10 +136,10 @@ async def callback_reset_selection(callback: CallbackQuery):
 async def callback_paginate_coins(callback: CallbackQuery):
     """Пагинация монет"""
     user_id = callback.from_user.id
-    lang = user_lang.get(user_id, "ru")
+    lang = await user_lang.get(user_id, "ru")
     page = int(callback.data.split("_")[1])
-    user_pages[user_id] = page
-    selected = user_coins.get(user_id, set())
+    await user_pages.set(user_id, page)
+    selected = await coin_selection.get(user_id, set())
     keyboard = await coins_keyboard(page=page, selected_coins=selected, language=lang)
     await callback.message.edit_reply_markup(reply_markup=keyboard)
     await callback.answer()
@@ -116,8 +154,8 @@ async def callback_confirm_selection(callback: CallbackQuery):
     - предлагаем интервал или сразу отправляем цены
     """
     user_id = callback.from_user.id
-    lang = user_lang.get(user_id, "ru")
-    selected = user_coins.get(user_id, set())
+    lang = await user_lang.get(user_id, "ru")
+    selected = await coin_selection.get(user_id, set())
 
     if not selected:
         await callback.answer(LEXICON[lang]["must_select_at_least_one"], show_alert=True)
@@ -125,25 +163,26 @@ async def callback_confirm_selection(callback: CallbackQuery):
 
     await callback.message.edit_reply_markup(reply_markup=None)
 
-    if user_id in temp_coin_msg:
+    coin_msg_id = await temp_coin_msg.pop(user_id)
+    if coin_msg_id is not None:
         try:
-            await callback.bot.delete_message(callback.message.chat.id, temp_coin_msg[user_id])
+            await callback.bot.delete_message(callback.message.chat.id, coin_msg_id)
         except Exception:
             pass
-        del temp_coin_msg[user_id]
 
-    await set_user_coins(user_id, list(selected))
+    await user_coins.set(user_id, list(selected))
+    await coin_selection.delete(user_id)
+    market_feed.track(selected)
 
-    if user_first_time.get(user_id, False):
-        user_first_time[user_id] = False
-        user_first_interval[user_id] = True
+    if await user_first_time.pop(user_id, False):
+        await user_first_interval.set(user_id, True)
         await callback.message.answer(LEXICON[lang]["selection_confirmed"])
         kb = interval_keyboard(lang)
         msg_interval = await callback.message.answer(
             LEXICON[lang]["notify_interval_prompt"],
             reply_markup=kb
         )
-        temp_interval_msg[user_id] = msg_interval.message_id
+        await temp_interval_msg.set(user_id, msg_interval.message_id)
     else:
         data = await get_crypto_prices(selected)
         msg_price = build_price_message(data, lang)
@@ -156,29 +195,31 @@ async def callback_confirm_selection(callback: CallbackQuery):
 async def callback_select_interval(callback: CallbackQuery):
     """Выбор интервала уведомлений"""
     user_id = callback.from_user.id
-    lang = user_lang.get(user_id, "ru")
+    lang = await user_lang.get(user_id, "ru")
     await callback.message.edit_reply_markup(reply_markup=None)
 
-    if user_id in temp_interval_msg:
+    interval_msg_id = await temp_interval_msg.pop(user_id)
+    if interval_msg_id is not None:
         try:
-            await callback.bot.delete_message(callback.message.chat.id, temp_interval_msg[user_id])
+            await callback.bot.delete_message(callback.message.chat.id, interval_msg_id)
         except Exception:
             pass
-        del temp_interval_msg[user_id]
 
     parts = callback.data.split("_", 1)
     interval_seconds = int(parts[1])
-    user_intervals[user_id] = interval_seconds
-    user_next_notify[user_id] = time.time() + interval_seconds
+    next_notify_at = time.time() + interval_seconds
+    if scheduler.handles(user_id):
+        user_intervals[user_id] = interval_seconds
+        scheduler.schedule(user_id, next_notify_at)
+    await set_notify_interval(user_id, interval_seconds, next_notify_at)
 
     await callback.message.answer(
         LEXICON[lang]["notify_set"],
         reply_markup=get_menu_buttons(lang)
     )
 
-    if user_first_interval.get(user_id, False):
-        user_first_interval[user_id] = False
-        selected = user_coins.get(user_id, set())
+    if await user_first_interval.pop(user_id, False):
+        selected = await user_coins.get(user_id, ())
         if selected:
             data = await get_crypto_prices(selected)
             msg_price = build_price_message(data, lang)
@@ -189,19 +230,17 @@ async def callback_select_interval(callback: CallbackQuery):
 
 
 # ------------------------ Проверка оплаты ------------------------
-async def verify_payment(payment_id: str):
-    payment = Payment.find_one(payment_id)
-    return payment.status == "succeeded"
-
 @router.callback_query(lambda c: c.data.startswith("check_payment_"))
 @user_language_chosen
 async def callback_check_payment(callback: CallbackQuery, **kwargs):
     user_id = callback.from_user.id
-    lang = user_lang[user_id]
+    lang = await user_lang.get(user_id)
     payment_id = callback.data.split("_")[2]
 
-    if await verify_payment(payment_id):
-        await set_user_premium(user_id)
+    # Статус ведёт фоновая проверка платежей, кнопка только читает локальную таблицу
+    payment = await get_payment(payment_id)
+    if payment and payment[1] == "succeeded":
         await callback.message.edit_text(LEXICON[lang]["premium_congratulations"])
     else:
+        await expedite_payment(payment_id, time.time())
         await callback.answer(LEXICON[lang]["premium_error"], show_alert=True)
\ No newline at end of file
@@ -1,21 +1,31 @@
+import html
+import logging
+import math
 from aiogram import Router
-from yookassa import Payment
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 
-from database import add_user, count_users, is_user_premium
+from database import add_user, count_users, is_user_premium, get_user_alerts
 from src.constants.admins import ADMINS
+from src.constants.constants import MAX_ALERTS_STANDARD, MAX_ALERTS_PREMIUM
 from src.constants.locales import LEXICON
 from src.constants.states import (
-    user_lang, user_first_time, user_first_interval,
-    user_pages, user_coins, temp_coin_msg, temp_interval_msg
+    user_lang, awaiting_language, user_first_time, user_first_interval,
+    user_pages, user_coins, coin_selection, temp_coin_msg, temp_interval_msg
 )
+from src.services.payments import create_payment
+from src.services.alerts import ABOVE, BELOW, MOVE, resolve_coin, create_alert, remove_alert, describe_alert
+from src.services.broadcast import broadcaster
+from src.services.coin_list import find_coins
 from src.keyboards.get_menu_buttons import get_menu_buttons
 from src.keyboards.coins_keyboard import coins_keyboard
 from src.keyboards.interval_keyboard import interval_keyboard
+from src.keyboards.find_keyboard import find_keyboard
 from src.utils.get_crypto_coins import get_crypto_prices, build_price_message
 from src.utils.user_language_chosen import user_language_chosen
 
+logger = logging.getLogger(__name__)
+
 router = Router()
 
 
@@ -33,9 +43,9 @@ async def cmd_start(message: Message):
         except ValueError:
             pass
 
-    user_lang[user_id] = None
-    user_first_time[user_id] = True
-    user_first_interval[user_id] = False
+    await awaiting_language.set(user_id, True)
+    await user_first_time.set(user_id, True)
+    await user_first_interval.delete(user_id)
 
     await add_user(user_id, message.from_user.username, referrer_id=referrer_id)
 
@@ -61,13 +71,15 @@ async def cmd_start(message: Message):
 @user_language_chosen
 async def cmd_menu(message: Message):
     """Команда /menu — показать список команд"""
-    lang = user_lang[message.from_user.id]
+    lang = await user_lang.get(message.from_user.id)
     lines = [
         LEXICON[lang]["menu_commands_header"],
         LEXICON[lang]["menu_start"],
         LEXICON[lang]["menu_choice_coin"],
+        LEXICON[lang]["menu_find"],
         LEXICON[lang]["menu_price"],
         LEXICON[lang]["menu_change_interval"],
+        LEXICON[lang]["menu_alert"],
         LEXICON[lang]["menu_menu"]
     ]
     await message.answer("\n".join(lines), reply_markup=get_menu_buttons(lang))
@@ -82,18 +94,18 @@ async def cmd_choice_coin(message: Message):
     - показ клавиатуры
     """
     user_id = message.from_user.id
-    lang = user_lang[user_id]
+    lang = await user_lang.get(user_id)
 
-    user_first_time[user_id] = False
-    user_coins[user_id] = set()
-    user_pages[user_id] = 0
+    await user_first_time.delete(user_id)
+    await coin_selection.set(user_id, set())
+    await user_pages.set(user_id, 0)
 
     keyboard = await coins_keyboard(page=0, selected_coins=set(), language=lang)
     msg = await message.answer(
         LEXICON[lang]["choose_coins_prompt"],
         reply_markup=keyboard
     )
-    temp_coin_msg[user_id] = msg.message_id
+    await temp_coin_msg.set(user_id, msg.message_id)
 
 
 @router.message(Command("price"))
@@ -101,8 +113,8 @@ async def cmd_choice_coin(message: Message):
 async def cmd_price(message: Message):
     """Команда /price — текущие цены выбранных монет"""
     user_id = message.from_user.id
-    lang = user_lang[user_id]
-    selected = user_coins.get(user_id, set())
+    lang = await user_lang.get(user_id)
+    selected = await user_coins.get(user_id, ())
 
     if not selected:
         await message.answer(
@@ -120,7 +132,7 @@ async def cmd_price(message: Message):
 @user_language_chosen
 async def cmd_user_stats(message: Message):
     """Команда /userStats — количество пользователей (только для админов)"""
-    lang = user_lang[message.from_user.id]
+    lang = await user_lang.get(message.from_user.id)
     if str(message.from_user.id) in ADMINS:
         await message.reply(LEXICON[lang]["admin_denied"])
         return
@@ -133,7 +145,7 @@ async def cmd_user_stats(message: Message):
 @user_language_chosen
 async def cmd_change_lang(message: Message, **kwargs):
     user_id = message.from_user.id
-    lang = user_lang[user_id]
+    lang = await user_lang.get(user_id)
 
     text = LEXICON[lang]["lang_change_info"]
     keyboard = InlineKeyboardMarkup(
@@ -152,15 +164,15 @@ async def cmd_change_interval(message: Message):
     Команда /change_interval — ручной выбор интервала уведомлений
     """
     user_id = message.from_user.id
-    lang = user_lang[user_id]
+    lang = await user_lang.get(user_id)
 
-    user_first_interval[user_id] = False
+    await user_first_interval.delete(user_id)
     kb = interval_keyboard(lang)
     msg = await message.answer(
         LEXICON[lang]["notify_interval_prompt"],
         reply_markup=kb
     )
-    temp_interval_msg[user_id] = msg.message_id
+    await temp_interval_msg.set(user_id, msg.message_id)
 
 
 @router.message(Command("get_premium"))
@@ -168,7 +180,7 @@ async def cmd_change_interval(message: Message):
 async def cmd_buy_premium(message: Message):
     """Команда /get_premium — покупка премиум-доступа через ЮKassa"""
     user_id = message.from_user.id
-    lang = user_lang[user_id]
+    lang = await user_lang.get(user_id)
 
     if await is_user_premium(user_id):
         await message.answer(LEXICON[lang]["premium_user"])
@@ -176,15 +188,13 @@ async def cmd_buy_premium(message: Message):
 
     referral_link = f"https://t.me/CryptoProPulseBot?start=ref_{user_id}"
 
-    payment = Payment.create({
-        "amount": {"value": "100.00", "currency": "RUB"},
-        "confirmation": {"type": "redirect", "return_url": "https://t.me/YourBotUsername"},
-        "capture": True,
-        "description": f"Premium-доступ для пользователя {user_id}"
-    })
-
-    payment_id = payment.id
-    payment_url = payment.confirmation.confirmation_url
+    try:
+        payment_id, payment_url = await create_payment(user_id)
+    except Exception as e:
+        # Таймаут, ошибка API ЮKassa или сети — платёж не создан
+        logger.warning("Payment creation for %s failed: %r", user_id, e)
+        await message.answer(LEXICON[lang]["premium_create_error"])
+        return
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text=LEXICON[lang]["premium_buy"], url=payment_url)],
@@ -197,4 +207,154 @@ async def cmd_buy_premium(message: Message):
     @router.callback_query(lambda c: c.data == "ref_premium")
     async def send_referral(callback: CallbackQuery):
         await callback.message.edit_reply_markup()
-        await callback.message.answer(LEXICON[lang]["referral_msg"].format(link=referral_link))
\ No newline at end of file
+        await callback.message.answer(LEXICON[lang]["referral_msg"].format(link=referral_link))
+
+
+# ------------------------ Поиск монет ------------------------
+@router.message(Command("find"))
+@user_language_chosen
+async def cmd_find(message: Message):
+    """Команда /find <текст> — поиск по всем монетам CoinGecko, кнопки добавляют монету в список пользователя"""
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    args = message.text.split(maxsplit=1)
+    if len(args) < 2:
+        await message.answer(LEXICON[lang]["find_usage"])
+        return
+    coins = await find_coins(args[1])
+    if not coins:
+        await message.answer(LEXICON[lang]["find_nothing"].format(query=html.escape(args[1])))
+        return
+    selected = await user_coins.get(user_id, ())
+    await message.answer(LEXICON[lang]["find_results"], reply_markup=find_keyboard(coins, selected))
+
+
+# ------------------------ Ценовые алерты ------------------------
+@router.message(Command("alert"))
+@user_language_chosen
+async def cmd_alert(message: Message):
+    """Команда /alert — алерт на пересечение цены (/alert btc 70000) или движение за час (/alert eth 5%)"""
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    args = message.text.split()[1:]
+    if len(args) != 2:
+        await message.answer(LEXICON[lang]["alert_usage"])
+        return
+
+    raw = args[1].replace(",", "").lstrip("$+-")
+    is_move = raw.endswith("%")
+    try:
+        value = float(raw.rstrip("%"))
+    except ValueError:
+        value = 0.0
+    if not math.isfinite(value) or value <= 0:
+        await message.answer(LEXICON[lang]["alert_usage"])
+        return
+
+    coin_id = await resolve_coin(args[0])
+    if coin_id is None:
+        await message.answer(LEXICON[lang]["alert_unknown_coin"].format(coin=html.escape(args[0])))
+        return
+
+    max_alerts = MAX_ALERTS_PREMIUM if await is_user_premium(user_id) else MAX_ALERTS_STANDARD
+    if len(await get_user_alerts(user_id)) >= max_alerts:
+        await message.answer(LEXICON[lang]["alert_limit"].format(max_alerts=max_alerts))
+        return
+
+    if is_move:
+        kind = MOVE
+    else:
+        # Направление — относительно текущей цены: порог выше неё ждёт роста, ниже — падения
+        data = await get_crypto_prices([coin_id])
+        values = data.get(coin_id) if isinstance(data, dict) else None
+        price = values.get("usd") if isinstance(values, dict) else None
+        if price is None:
+            await message.answer(LEXICON[lang]["no_data"])
+            return
+        kind = ABOVE if value > price else BELOW
+
+    alert_id = await create_alert(user_id, coin_id, kind, value)
+    await message.answer(LEXICON[lang]["alert_created"].format(
+        alert_id=alert_id, alert=describe_alert(coin_id, kind, value, lang)
+    ))
+
+
+@router.message(Command("alerts"))
+@user_language_chosen
+async def cmd_alerts(message: Message):
+    """Команда /alerts — список алертов пользователя"""
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    alerts = await get_user_alerts(user_id)
+    if not alerts:
+        await message.answer(LEXICON[lang]["alerts_empty"])
+        return
+    lines = [LEXICON[lang]["alerts_header"]]
+    for alert_id, coin_id, kind, value in alerts:
+        lines.append(f"#{alert_id} {describe_alert(coin_id, kind, value, lang)}")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("alert_del"))
+@user_language_chosen
+async def cmd_alert_del(message: Message):
+    """Команда /alert_del <id> — удалить алерт"""
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    args = message.text.split()[1:]
+    if len(args) != 1 or not args[0].lstrip("#").isdigit():
+        await message.answer(LEXICON[lang]["alert_usage"])
+        return
+    alert_id = int(args[0].lstrip("#"))
+    if await remove_alert(user_id, alert_id):
+        await message.answer(LEXICON[lang]["alert_deleted"].format(alert_id=alert_id))
+    else:
+        await message.answer(LEXICON[lang]["alert_not_found"].format(alert_id=alert_id))
+
+
+# ------------------------ Объявления (только для админов) ------------------------
+@router.message(Command("broadcast"))
+@user_language_chosen
+async def cmd_broadcast(message: Message):
+    """Команда /broadcast <текст> — разослать объявление всем активным пользователям"""
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    if user_id not in ADMINS:
+        await message.reply(LEXICON[lang]["admin_denied"])
+        return
+    # html_text сохраняет форматирование админа и экранирует всё остальное
+    parts = message.html_text.split(maxsplit=1)
+    if len(parts) < 2:
+        await message.answer(LEXICON[lang]["broadcast_usage"])
+        return
+    if broadcaster.active:
+        await message.answer(LEXICON[lang]["broadcast_busy"])
+        return
+    progress = await message.answer(LEXICON[lang]["broadcast_starting"])
+    await broadcaster.start(parts[1], user_id, progress.message_id)
+
+
+@router.message(Command("broadcast_status"))
+@user_language_chosen
+async def cmd_broadcast_status(message: Message):
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    if user_id not in ADMINS:
+        await message.reply(LEXICON[lang]["admin_denied"])
+        return
+    if broadcaster.current is None:
+        await message.answer(LEXICON[lang]["broadcast_none"])
+        return
+    await message.answer(broadcaster.format_progress(lang))
+
+
+@router.message(Command("broadcast_cancel"))
+@user_language_chosen
+async def cmd_broadcast_cancel(message: Message):
+    user_id = message.from_user.id
+    lang = await user_lang.get(user_id)
+    if user_id not in ADMINS:
+        await message.reply(LEXICON[lang]["admin_denied"])
+        return
+    key = "broadcast_cancelling" if broadcaster.cancel() else "broadcast_none"
+    await message.answer(LEXICON[lang][key])
@@ -0,0 +1,132 @@
+"""
+Inline-режим: «@bot btc eth» в любом чате. Монеты ищутся по индексу топ-100, цены берутся из общего
+кеша, а если там их нет — из самого списка топ-100; в CoinGecko запрос уходит только для монеты,
+цены которой нет нигде, и с коротким таймаутом. Устаревшие цены освежаются в фоне.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from aiogram import Router
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+
+from src.constants.constants import (
+    INLINE_CACHE_TIME, INLINE_MAX_COINS, INLINE_MAX_RESULTS, INLINE_FETCH_TIMEOUT, INLINE_LATENCY_WINDOW
+)
+from src.constants.locales import LEXICON
+from src.services.coin_index import top_coins_index
+from src.services.price_cache import price_cache
+from src.utils.get_crypto_coins import get_crypto_prices, format_price_line, format_updated_time, assemble_price_message
+
+logger = logging.getLogger(__name__)
+
+router = Router()
+
+_latencies = deque(maxlen=INLINE_LATENCY_WINDOW)    # секунды на ответ без учёта отправки в Telegram
+_background = set()                                 # фоновые обновления цен (ссылки, чтобы задачи не собрал GC)
+
+
+@router.inline_query()
+async def inline_prices(query: InlineQuery):
+    started = time.perf_counter()
+    lang = "ru" if (query.from_user.language_code or "").startswith("ru") else "en"
+    coins, combined = match_coins(query.query)
+    prices = await get_inline_prices(coins)
+    results = build_results(coins, prices, combined, lang)
+    record_latency(time.perf_counter() - started)
+    await query.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False)
+
+
+def match_coins(text: str) -> tuple:
+    """
+    Монеты для запроса и признак «несколько тикеров»: пустой запрос — первые монеты топа,
+    одно слово — варианты по префиксу, несколько слов — лучшая монета на каждое
+    """
+    words = text.replace(",", " ").split()[:INLINE_MAX_COINS]
+    if not words:
+        return top_coins_index.coins[:INLINE_MAX_COINS], False
+    if len(words) == 1:
+        return top_coins_index.lookup(words[0], INLINE_MAX_RESULTS), False
+    coins = {}
+    for word in words:
+        for coin in top_coins_index.lookup(word, 1):
+            coins.setdefault(coin["id"], coin)
+    return list(coins.values()), len(coins) > 1
+
+
+async def get_inline_prices(coins: list) -> dict:
+    prices = {}
+    stale = []
+    missing = []
+    for coin in coins:
+        values = price_cache.peek(coin["id"])
+        if values is None:
+            values = _market_values(coin)
+            (stale if values is not None else missing).append(coin["id"])
+        if values is not None:
+            prices[coin["id"]] = values
+    if stale:
+        _refresh_in_background(stale)
+    if missing:
+        try:
+            prices.update(await asyncio.wait_for(asyncio.shield(get_crypto_prices(missing)), INLINE_FETCH_TIMEOUT))
+        except Exception as e:
+            logger.warning("Inline price fetch for %d coins failed: %r", len(missing), e)
+    return prices
+
+
+def _market_values(coin: dict):
+    """Цена из списка топ-100 в формате /simple/price (обновляется раз в MARKET_CACHE_TTL)"""
+    price = coin.get("current_price")
+    if not isinstance(price, (int, float)):
+        return None
+    return {"usd": price, "usd_24h_change": coin.get("price_change_percentage_24h") or 0.0}
+
+
+def _refresh_in_background(coin_ids: list):
+    task = asyncio.create_task(get_crypto_prices(coin_ids))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def build_results(coins: list, prices: dict, combined: bool, lang: str) -> list:
+    updated = format_updated_time()
+    results = []
+    lines = {coin["id"]: format_price_line(coin["id"], prices[coin["id"]]) for coin in coins if coin["id"] in prices}
+    if combined and len(lines) > 1:
+        symbols = ", ".join(coin["symbol"].upper() for coin in coins if coin["id"] in lines)
+        results.append(InlineQueryResultArticle(
+            id="all:" + ",".join(lines)[:60],
+            title=LEXICON[lang]["inline_all_title"].format(symbols=symbols),
+            input_message_content=InputTextMessageContent(
+                message_text=assemble_price_message(list(lines.values()), lang, updated)
+            ),
+        ))
+    for coin in coins:
+        line = lines.get(coin["id"])
+        if line is None:
+            continue
+        values = prices[coin["id"]]
+        results.append(InlineQueryResultArticle(
+            id=coin["id"][:64],
+            title=f"{coin['symbol'].upper()} ${values['usd']:,}",
+            description=f"{coin.get('name', coin['id'])} • {values.get('usd_24h_change') or 0.0:+.2f}% (24h)",
+            input_message_content=InputTextMessageContent(message_text=assemble_price_message([line], lang, updated)),
+        ))
+    return results[:INLINE_MAX_RESULTS]
+
+
+def record_latency(seconds: float):
+    _latencies.append(seconds)
+    if len(_latencies) == INLINE_LATENCY_WINDOW:
+        p50, p99 = latency_percentiles()
+        logger.info("Inline queries: p50 %.2f ms, p99 %.2f ms over %d", p50 * 1000, p99 * 1000, len(_latencies))
+        _latencies.clear()
+
+
+def latency_percentiles() -> tuple:
+    ordered = sorted(_latencies)
+    if not ordered:
+        return 0.0, 0.0
+    return ordered[len(ordered) // 2], ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
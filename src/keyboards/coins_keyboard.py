@@ -3,73 +3,109 @@ from aiogram.types import (
     InlineKeyboardButton,
 )
 from src.constants.locales import LEXICON
+from src.services.market_cache import market_cache
 from src.utils.get_crypto_coins import get_top_100_coins
 
-# ------------------------ Инлайн-клавиатура выбора монет ------------------------
-async def coins_keyboard(page=0, per_page=15, selected_coins=None, language="ru"):
-    if selected_coins is None:
-        selected_coins = set()
+# ------------------------ Шаблоны клавиатуры выбора монет ------------------------
+# Кнопки собираются один раз на обновление списка топ-100; на каждый запрос
+# остаётся только выбрать для монеты вариант «выбрана/не выбрана».
+PER_PAGE = 15
+_templates = {}         # (language, per_page) -> [_PageTemplate, ...]
+_action_rows = {}       # language -> [«Сбросить», «Подтвердить»]
 
-    coins_data = await get_top_100_coins()
-    total_coins = len(coins_data)
-    if total_coins == 0:
-        return InlineKeyboardMarkup(inline_keyboard=[])
 
-    total_pages = (total_coins - 1) // per_page
-    page = max(0, min(page, total_pages))
+class _PageTemplate:
+    __slots__ = ("coins", "nav_row", "empty_markup")
 
-    start = page * per_page
-    end = min(start + per_page, total_coins)
+    def __init__(self, coins: tuple, nav_row: list, empty_markup: InlineKeyboardMarkup):
+        self.coins = coins                  # ((coin_id, кнопка «выбрана», кнопка «не выбрана»), ...)
+        self.nav_row = nav_row
+        self.empty_markup = empty_markup    # готовая клавиатура без выбранных монет
 
-    kb_buttons = []
-    row = []
 
+def _build_pages(coins_data: list, per_page: int, language: str) -> list:
     prefix_sel = LEXICON[language]["choose_coins_button_prefix_selected"]
     prefix_not_sel = LEXICON[language]["choose_coins_button_prefix_not_selected"]
+    total_pages = (len(coins_data) - 1) // per_page
+    pages = []
+    for page in range(total_pages + 1):
+        coins = []
+        for coin in coins_data[page * per_page:(page + 1) * per_page]:
+            coin_id = coin['id']
+            symbol = coin['symbol'].upper()
+            callback_data = f"coin_{coin_id}_{page}"
+            coins.append((
+                coin_id,
+                InlineKeyboardButton(text=f"{prefix_sel} {symbol}", callback_data=callback_data),
+                InlineKeyboardButton(text=f"{prefix_not_sel} {symbol}", callback_data=callback_data),
+            ))
 
-    for coin in coins_data[start:end]:
-        coin_id = coin['id']
-        symbol = coin['symbol'].upper()
-        prefix = prefix_sel if coin_id in selected_coins else prefix_not_sel
-        row.append(
-            InlineKeyboardButton(
-                text=f"{prefix} {symbol}",
-                callback_data=f"coin_{coin_id}_{page}"
+        nav_row = []
+        if page > 0:
+            nav_row.append(
+                InlineKeyboardButton(text=LEXICON[language]["back"], callback_data=f"page_{page - 1}")
             )
-        )
-        if len(row) == 3:
-            kb_buttons.append(row)
-            row = []
-    if row:
-        kb_buttons.append(row)
-
-    nav_row = []
-    if page > 0:
-        nav_row.append(
-            InlineKeyboardButton(
-                text=LEXICON[language]["back"],
-                callback_data=f"page_{page - 1}"
+        if page < total_pages:
+            nav_row.append(
+                InlineKeyboardButton(text=LEXICON[language]["forward"], callback_data=f"page_{page + 1}")
             )
-        )
-    if page < total_pages:
-        nav_row.append(
-            InlineKeyboardButton(
-                text=LEXICON[language]["forward"],
-                callback_data=f"page_{page + 1}"
-            )
-        )
-    if nav_row:
-        kb_buttons.append(nav_row)
-
-    if selected_coins:
-        reset_btn = InlineKeyboardButton(
-            text=LEXICON[language]["reset_selection"],
-            callback_data="reset_selection"
-        )
-        confirm_btn = InlineKeyboardButton(
-            text=LEXICON[language]["confirm_selection"],
-            callback_data="confirm_selection"
-        )
-        kb_buttons.append([reset_btn, confirm_btn])
-
-    return InlineKeyboardMarkup(inline_keyboard=kb_buttons)
+
+        rows = _rows([not_selected for _, _, not_selected in coins])
+        if nav_row:
+            rows.append(nav_row)
+        pages.append(_PageTemplate(tuple(coins), nav_row, InlineKeyboardMarkup(inline_keyboard=rows)))
+    return pages
+
+
+def _rows(buttons: list, width: int = 3) -> list:
+    return [buttons[i:i + width] for i in range(0, len(buttons), width)]
+
+
+def _action_row(language: str) -> list:
+    row = _action_rows.get(language)
+    if row is None:
+        row = _action_rows[language] = [
+            InlineKeyboardButton(text=LEXICON[language]["reset_selection"], callback_data="reset_selection"),
+            InlineKeyboardButton(text=LEXICON[language]["confirm_selection"], callback_data="confirm_selection"),
+        ]
+    return row
+
+
+def _rebuild_templates(coins_data: list):
+    """Вызывается при каждом обновлении списка топ-100"""
+    _templates.clear()
+    if coins_data:
+        for language in LEXICON:
+            _templates[(language, PER_PAGE)] = _build_pages(coins_data, PER_PAGE, language)
+
+
+market_cache.listeners.append(_rebuild_templates)
+
+
+# ------------------------ Инлайн-клавиатура выбора монет ------------------------
+async def coins_keyboard(page=0, per_page=PER_PAGE, selected_coins=None, language="ru"):
+    if selected_coins is None:
+        selected_coins = set()
+
+    pages = _templates.get((language, per_page))
+    if pages is None:
+        coins_data = await get_top_100_coins()
+        if not coins_data:
+            return InlineKeyboardMarkup(inline_keyboard=[])
+        pages = _templates[(language, per_page)] = _build_pages(coins_data, per_page, language)
+
+    page = max(0, min(page, len(pages) - 1))
+    template = pages[page]
+    if not selected_coins:
+        return template.empty_markup
+
+    buttons = [
+        selected if coin_id in selected_coins else not_selected
+        for coin_id, selected, not_selected in template.coins
+    ]
+    kb_buttons = _rows(buttons)
+    if template.nav_row:
+        kb_buttons.append(template.nav_row)
+    kb_buttons.append(_action_row(language))
+    # Кнопки уже провалидированы при сборке шаблона
+    return InlineKeyboardMarkup.model_construct(inline_keyboard=kb_buttons)
@@ -0,0 +1,31 @@
+from aiogram.types import (
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+)
+
+MARK_SELECTED = "✅"
+MARK_NOT_SELECTED = "➕"
+
+
+# ------------------------ Инлайн-клавиатура результатов /find ------------------------
+def find_keyboard(coins: list, selected_coins) -> InlineKeyboardMarkup:
+    rows = []
+    for coin in coins:
+        callback_data = f"find_{coin['id']}"
+        if len(callback_data.encode()) > 64:
+            continue    # лимит Telegram на callback_data
+        mark = MARK_SELECTED if coin["id"] in selected_coins else MARK_NOT_SELECTED
+        label = f"{coin.get('symbol', '').upper()} · {coin.get('name', coin['id'])}"
+        rows.append([InlineKeyboardButton(text=f"{mark} {label}", callback_data=callback_data)])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def refresh_find_keyboard(markup: InlineKeyboardMarkup, selected_coins) -> InlineKeyboardMarkup:
+    """Те же кнопки с обновлёнными отметками — без повторного поиска"""
+    rows = []
+    for row in markup.inline_keyboard:
+        coin_id = row[0].callback_data.split("_", 1)[1]
+        label = row[0].text.split(" ", 1)[1]
+        mark = MARK_SELECTED if coin_id in selected_coins else MARK_NOT_SELECTED
+        rows.append([InlineKeyboardButton(text=f"{mark} {label}", callback_data=row[0].callback_data)])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -1,8 +1,10 @@
+from functools import lru_cache
 from aiogram.types import (
     ReplyKeyboardMarkup,
     KeyboardButton,
 )
 
+@lru_cache(maxsize=None)
 def get_menu_buttons(language: str) -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(
         keyboard=[
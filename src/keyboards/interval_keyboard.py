@@ -1,3 +1,4 @@
+from functools import lru_cache
 from aiogram.types import (
     InlineKeyboardMarkup,
     InlineKeyboardButton,
@@ -5,6 +6,7 @@ from aiogram.types import (
 from src.constants.locales import LEXICON
 
 # ------------------------ Инлайн-клавиатура выбора интервала ------------------------
+@lru_cache(maxsize=None)
 def interval_keyboard(lang: str) -> InlineKeyboardMarkup:
     intervals = [
         # ("notify_1m", "60"),
@@ -0,0 +1,363 @@
+"""
+Ценовые алерты: «цена выше/ниже X» и «изменение на ±Y% за час».
+Пороги каждой монеты лежат в отсортированных массивах, поэтому тик стоит
+O(монет · log алертов + сработавших), а не проход по всем алертам.
+Проверка идёт на каждом общем снимке цен: и на снимках рассылки, и на собственных по таймеру.
+"""
+import asyncio
+import logging
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque, namedtuple
+
+from database import (
+    iter_alerts, add_alert, delete_alerts, delete_user_alert, get_existing_alerts, get_user_profiles
+)
+from src.constants.constants import (
+    ALERT_CHECK_INTERVAL, ALERT_MOVE_WINDOW, ALERT_LOAD_CHUNK_SIZE, ALERT_DISPATCH_BATCH, ALERT_DELIVERY_ATTEMPTS
+)
+from src.constants.locales import LEXICON
+from src.services.market_feed import market_feed
+from src.services.price_snapshot import snapshot_listeners, take_snapshot
+from src.services.sender import sender
+from src.utils.get_crypto_coins import get_top_100_coins
+
+logger = logging.getLogger(__name__)
+
+ABOVE, BELOW, MOVE = "above", "below", "move"
+
+FiredAlert = namedtuple("FiredAlert", "alert_id user_id coin_id kind value price change")
+
+
+def _key(kind: str, value: float) -> float:
+    # Ключи выбраны так, чтобы сработавшие алерты всегда были хвостом массива (ключ >= пробы):
+    # above — цена >= X, т.е. -X >= -цена; below — X >= цена; move — -Y >= -|изменение|
+    return value if kind == BELOW else -value
+
+
+class _Thresholds:
+    """Алерты одного вида по одной монете: ключи по возрастанию и параллельно id алерта и пользователя"""
+    __slots__ = ("keys", "alert_ids", "user_ids")
+
+    def __init__(self):
+        self.keys = array("d")
+        self.alert_ids = array("q")
+        self.user_ids = array("q")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key: float, alert_id: int, user_id: int):
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.alert_ids.insert(i, alert_id)
+        self.user_ids.insert(i, user_id)
+
+    def remove(self, key: float, alert_id: int) -> bool:
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.alert_ids[i] == alert_id:
+                del self.keys[i], self.alert_ids[i], self.user_ids[i]
+                return True
+            i += 1
+        return False
+
+    def fire(self, probe: float) -> list:
+        """Снимает все алерты с ключом >= probe: [(ключ, alert_id, user_id), ...]"""
+        i = bisect_left(self.keys, probe)
+        if i == len(self.keys):
+            return []
+        fired = list(zip(self.keys[i:], self.alert_ids[i:], self.user_ids[i:]))
+        del self.keys[i:], self.alert_ids[i:], self.user_ids[i:]
+        return fired
+
+    @classmethod
+    def from_rows(cls, rows: list):
+        """Сборка из [(ключ, alert_id, user_id), ...] одной сортировкой — при загрузке из базы"""
+        rows.sort()
+        thresholds = cls()
+        thresholds.keys = array("d", (row[0] for row in rows))
+        thresholds.alert_ids = array("q", (row[1] for row in rows))
+        thresholds.user_ids = array("q", (row[2] for row in rows))
+        return thresholds
+
+
+class AlertEngine:
+    def __init__(self, move_window: float = ALERT_MOVE_WINDOW):
+        self.move_window = move_window
+        self._index = {ABOVE: {}, BELOW: {}, MOVE: {}}      # вид -> coin_id -> _Thresholds
+        self._history = {}          # coin_id -> deque[(taken_at, price)] за окно move_window
+        self._fired = []            # сработали, но ещё не отправлены
+        self._dispatching = {}      # alert_id -> FiredAlert: отправляются, из базы удаляются после доставки
+        self._attempts = {}         # alert_id -> срабатываний без доставки
+        self._added = {}            # alert_id -> (user_id, coin_id, kind, value): созданы здесь после last_alert_id
+        self.last_alert_id = 0      # алерты с id до этого уже прочитаны из базы
+        self.fired = asyncio.Event()
+        self.lock = asyncio.Lock()
+        # owns(user_id) -> bool; None — этот процесс алерты не проверяет
+        self.owns = None
+
+    def __len__(self):
+        return sum(len(t) for by_coin in self._index.values() for t in by_coin.values())
+
+    def coins(self) -> set:
+        return {coin_id for by_coin in self._index.values() for coin_id, t in by_coin.items() if t}
+
+    def add(self, alert_id: int, user_id: int, coin_id: str, kind: str, value: float):
+        """Алерт, созданный в этом процессе: сразу в индекс, не дожидаясь sync"""
+        if self.owns is None or not self.owns(user_id):
+            return
+        if alert_id > self.last_alert_id:
+            self._added[alert_id] = (user_id, coin_id, kind, value)
+        self._insert(alert_id, user_id, coin_id, kind, value)
+
+    def _insert(self, alert_id: int, user_id: int, coin_id: str, kind: str, value: float):
+        by_coin = self._index[kind]
+        if coin_id not in by_coin:
+            by_coin[coin_id] = _Thresholds()
+        by_coin[coin_id].add(_key(kind, value), alert_id, user_id)
+
+    def remove(self, alert_id: int, coin_id: str, kind: str, value: float) -> bool:
+        self._added.pop(alert_id, None)
+        thresholds = self._index[kind].get(coin_id)
+        return thresholds is not None and thresholds.remove(_key(kind, value), alert_id)
+
+    async def reload(self, owns, chunk_size: int = ALERT_LOAD_CHUNK_SIZE) -> int:
+        """Перечитывает алерты своего шарда из базы (при старте и при перераспределении шардов)"""
+        async with self.lock:
+            rows = {ABOVE: {}, BELOW: {}, MOVE: {}}
+            last_id = self.last_alert_id
+            async for chunk in iter_alerts(chunk_size):
+                for alert_id, user_id, coin_id, kind, value in chunk:
+                    if owns(user_id):
+                        rows[kind].setdefault(coin_id, []).append((_key(kind, value), alert_id, user_id))
+                last_id = max(last_id, chunk[-1][0])
+            # Созданные здесь во время загрузки, но не попавшие в неё
+            for alert_id, (user_id, coin_id, kind, value) in self._added.items():
+                if alert_id > last_id and owns(user_id):
+                    rows[kind].setdefault(coin_id, []).append((_key(kind, value), alert_id, user_id))
+            self._added = {alert_id: alert for alert_id, alert in self._added.items() if alert_id > last_id}
+            # on_snapshot не ждёт блокировки: сработавшие по старому индексу, пока шло чтение,
+            # ещё лежат в базе и в новый индекс попасть не должны. Считаем их прямо перед заменой
+            self._drop_pending(rows)
+            loaded = sum(len(coin_rows) for by_coin in rows.values() for coin_rows in by_coin.values())
+            self.last_alert_id = last_id
+            self._index = {
+                kind: {coin_id: _Thresholds.from_rows(coin_rows) for coin_id, coin_rows in by_coin.items()}
+                for kind, by_coin in rows.items()
+            }
+            self.owns = owns
+        logger.info("Loaded %d price alerts", loaded)
+        return loaded
+
+    def _drop_pending(self, rows: dict):
+        pending = {alert.alert_id: alert for alert in self._fired}
+        pending.update(self._dispatching)
+        for kind, coin_id in {(alert.kind, alert.coin_id) for alert in pending.values()}:
+            coin_rows = rows[kind].get(coin_id)
+            if coin_rows:
+                rows[kind][coin_id] = [row for row in coin_rows if row[1] not in pending]
+
+    async def sync(self, chunk_size: int = ALERT_LOAD_CHUNK_SIZE) -> int:
+        """Догружает алерты, созданные после последнего чтения, в том числе другими процессами"""
+        if self.owns is None:
+            return 0
+        async with self.lock:
+            added = 0
+            async for chunk in iter_alerts(chunk_size, after_id=self.last_alert_id):
+                for alert_id, user_id, coin_id, kind, value in chunk:
+                    if alert_id not in self._added and self.owns(user_id):
+                        self._insert(alert_id, user_id, coin_id, kind, value)
+                        added += 1
+                self.last_alert_id = chunk[-1][0]
+            self._added = {alert_id: alert for alert_id, alert in self._added.items() if alert_id > self.last_alert_id}
+        if added:
+            logger.info("Picked up %d new price alerts", added)
+        return added
+
+    def evaluate(self, prices: dict, taken_at: float) -> list:
+        """Проверяет снимок {coin_id: {"usd": цена, ...}}; сработавшие снимаются с индекса"""
+        fired = []
+        above, below, moves = self._index[ABOVE], self._index[BELOW], self._index[MOVE]
+        for coin_id, values in prices.items():
+            price = values.get("usd") if isinstance(values, dict) else None
+            if not isinstance(price, (int, float)):
+                continue
+            thresholds = above.get(coin_id)
+            if thresholds:
+                for key, alert_id, user_id in thresholds.fire(-price):
+                    fired.append(FiredAlert(alert_id, user_id, coin_id, ABOVE, -key, price, None))
+            thresholds = below.get(coin_id)
+            if thresholds:
+                for key, alert_id, user_id in thresholds.fire(price):
+                    fired.append(FiredAlert(alert_id, user_id, coin_id, BELOW, key, price, None))
+            thresholds = moves.get(coin_id)
+            if thresholds:
+                change = self._change(coin_id, price, taken_at)
+                if change is not None:
+                    for key, alert_id, user_id in thresholds.fire(-abs(change)):
+                        fired.append(FiredAlert(alert_id, user_id, coin_id, MOVE, -key, price, change))
+        return fired
+
+    def _change(self, coin_id: str, price: float, taken_at: float):
+        """Изменение цены в % к самой ранней цене в окне; None, пока сравнивать не с чем"""
+        history = self._history.get(coin_id)
+        if history is None:
+            history = self._history[coin_id] = deque()
+        while history and history[0][0] < taken_at - self.move_window:
+            history.popleft()
+        history.append((taken_at, price))
+        reference = history[0][1]
+        return (price / reference - 1) * 100 if reference else None
+
+    def on_snapshot(self, snapshot):
+        if self.owns is None:
+            return
+        fired = self.evaluate(snapshot.prices, snapshot.taken_at)
+        if fired:
+            self._fired.extend(fired)
+            self.fired.set()
+
+    async def dispatch(self):
+        """
+        Уведомляет пользователей о сработавших алертах. Из базы алерт удаляется только после доставки:
+        недоставленный возвращается в индекс и сработает снова, пока не кончатся ALERT_DELIVERY_ATTEMPTS
+        """
+        async with self.lock:
+            fired, self._fired = self._fired, []
+            self.fired.clear()
+            self._dispatching.update((alert.alert_id, alert) for alert in fired)
+        if not fired:
+            return
+        delivered = set()
+        # Удалённые за это время (в том числе в другом процессе) не отправляем и не возвращаем
+        alive = fired
+        try:
+            existing = await get_existing_alerts([alert.alert_id for alert in fired])
+            alive = [alert for alert in fired if alert.alert_id in existing]
+            profiles = await get_user_profiles({alert.user_id for alert in alive})
+            for first in range(0, len(alive), ALERT_DISPATCH_BATCH):
+                batch = alive[first:first + ALERT_DISPATCH_BATCH]
+                results = await asyncio.gather(*(
+                    sender.deliver(alert.user_id, format_fired(alert, _language(profiles, alert.user_id)))
+                    for alert in batch
+                ))
+                done = [alert.alert_id for alert, ok in zip(batch, results) if ok]
+                await delete_alerts(done)
+                delivered.update(done)
+        finally:
+            expired = await self._rearm(fired, alive, delivered)
+        logger.info("Fired %d price alerts, %d delivered", len(alive), len(delivered))
+        if expired:
+            logger.warning("Dropped %d price alerts after %d failed deliveries", len(expired), ALERT_DELIVERY_ATTEMPTS)
+
+    async def _rearm(self, fired: list, alive: list, delivered: set) -> list:
+        """Возвращает в индекс недоставленные алерты; удаляет те, что не доставились ALERT_DELIVERY_ATTEMPTS раз"""
+        expired = []
+        async with self.lock:
+            for alert in fired:
+                self._dispatching.pop(alert.alert_id, None)
+            for alert in alive:
+                if alert.alert_id in delivered:
+                    self._attempts.pop(alert.alert_id, None)
+                    continue
+                attempts = self._attempts.get(alert.alert_id, 0) + 1
+                if attempts >= ALERT_DELIVERY_ATTEMPTS:
+                    self._attempts.pop(alert.alert_id, None)
+                    expired.append(alert.alert_id)
+                elif self.owns is not None and self.owns(alert.user_id):
+                    self._attempts[alert.alert_id] = attempts
+                    self._insert(alert.alert_id, alert.user_id, alert.coin_id, alert.kind, alert.value)
+        await delete_alerts(expired)
+        return expired
+
+
+def _language(profiles: dict, user_id: int) -> str:
+    profile = profiles.get(user_id)
+    return profile.language if profile else "en"
+
+
+async def resolve_coin(query: str):
+    """id или тикер монеты из топ-100 -> coin_id; None, если такой нет"""
+    query = query.lower()
+    coins = await get_top_100_coins()
+    for coin in coins:
+        if coin["id"] == query:
+            return coin["id"]
+    for coin in coins:
+        if coin["symbol"].lower() == query:
+            return coin["id"]
+    return None
+
+
+async def create_alert(user_id: int, coin_id: str, kind: str, value: float) -> int:
+    alert_id = await add_alert(user_id, coin_id, kind, value, time.time())
+    alert_engine.add(alert_id, user_id, coin_id, kind, value)
+    market_feed.track((coin_id,))
+    return alert_id
+
+
+async def remove_alert(user_id: int, alert_id: int) -> bool:
+    row = await delete_user_alert(user_id, alert_id)
+    if row is None:
+        return False
+    alert_engine.remove(alert_id, *row)
+    return True
+
+
+def describe_alert(coin_id: str, kind: str, value: float, lang: str) -> str:
+    return LEXICON[lang][f"alert_{kind}"].format(coin=coin_id.title(), value=format_value(value))
+
+
+def format_value(value: float):
+    """70000.0 -> 70000, дробные пороги как есть"""
+    return int(value) if float(value).is_integer() else value
+
+
+def format_fired(alert: FiredAlert, lang: str) -> str:
+    return LEXICON[lang][f"alert_fired_{alert.kind}"].format(
+        coin=alert.coin_id.title(), value=format_value(alert.value), price=alert.price, change=alert.change
+    )
+
+
+alert_engine = AlertEngine()
+snapshot_listeners.append(alert_engine.on_snapshot)
+
+
+async def run_alerts(interval: float = ALERT_CHECK_INTERVAL, feed=None):
+    """
+    Фоновая задача отправки сработавших алертов. С лентой цен (services.market_feed) алерты
+    проверяются на каждом её обновлении, без неё — на своём снимке монет с алертами раз в interval.
+    """
+    if feed is not None:
+        queue = feed.subscribe()
+        while True:
+            # Таймаут нужен, чтобы не задерживать алерты, сработавшие на снимках рассылки
+            try:
+                alert_engine.on_snapshot(await asyncio.wait_for(queue.get(), interval))
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await alert_engine.dispatch()
+            except Exception:
+                logger.exception("Alert dispatch failed")
+
+    next_check = 0.0
+    while True:
+        if time.monotonic() >= next_check:
+            coins = alert_engine.coins()
+            if coins:
+                try:
+                    await take_snapshot(coins)
+                except Exception as e:
+                    logger.error("Alert price snapshot failed: %r", e)
+            next_check = time.monotonic() + interval
+        try:
+            await alert_engine.dispatch()
+        except Exception:
+            logger.exception("Alert dispatch failed")
+        try:
+            await asyncio.wait_for(alert_engine.fired.wait(), max(next_check - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            pass
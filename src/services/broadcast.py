@@ -0,0 +1,142 @@
+"""
+Объявления всем пользователям от админа. Получатели читаются из базы страницами по ключу user_id,
+отправка идёт через общий MessageSender (тот же лимит Telegram, что и у уведомлений),
+а после каждой страницы прогресс сохраняется в broadcasts — после падения или перезапуска
+отправка продолжается со следующей страницы. Память не зависит от числа получателей.
+"""
+import asyncio
+import logging
+import time
+from collections import namedtuple
+
+from database import (
+    create_broadcast, get_running_broadcast, get_broadcast_recipients, save_broadcast_progress, get_language
+)
+from src.constants.constants import BROADCAST_PAGE_SIZE, BROADCAST_CONCURRENCY, BROADCAST_PROGRESS_INTERVAL
+from src.constants.locales import LEXICON
+from src.services.sender import sender
+
+logger = logging.getLogger(__name__)
+
+RUNNING, DONE, CANCELLED = "running", "done", "cancelled"
+
+BroadcastState = namedtuple(
+    "BroadcastState", "broadcast_id text admin_id progress_message_id status total last_user_id sent failed"
+)
+
+
+class Broadcaster:
+    def __init__(self, page_size: int = BROADCAST_PAGE_SIZE, concurrency: int = BROADCAST_CONCURRENCY,
+                 progress_interval: float = BROADCAST_PROGRESS_INTERVAL):
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self.current = None         # BroadcastState идущего объявления
+        self._task = None
+        self._cancelled = False
+        self._started = 0.0
+        self._processed = 0         # отправлено этим процессом — для скорости, без учёта до перезапуска
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, text: str, admin_id: int, progress_message_id: int = None) -> BroadcastState:
+        row = await create_broadcast(text, admin_id, progress_message_id, time.time())
+        self._launch(BroadcastState(*row))
+        return self.current
+
+    async def resume(self):
+        """При старте процесса продолжает незавершённое объявление"""
+        row = await get_running_broadcast()
+        if row is not None:
+            state = BroadcastState(*row)
+            logger.info("Resuming broadcast #%d after user %d", state.broadcast_id, state.last_user_id)
+            self._launch(state)
+
+    def cancel(self) -> bool:
+        """Остановка после текущей страницы"""
+        if not self.active:
+            return False
+        self._cancelled = True
+        return True
+
+    def _launch(self, state: BroadcastState):
+        self.current = state
+        self._cancelled = False
+        self._started = time.monotonic()
+        self._processed = 0
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        state = self.current
+        semaphore = asyncio.Semaphore(self.concurrency)
+        reported = time.monotonic()
+
+        async def deliver(user_id: int) -> bool:
+            async with semaphore:
+                return await sender.deliver(user_id, state.text)
+
+        try:
+            while not self._cancelled:
+                user_ids = await get_broadcast_recipients(state.last_user_id, self.page_size)
+                if not user_ids:
+                    break
+                results = await asyncio.gather(*(deliver(user_id) for user_id in user_ids))
+                sent = sum(results)
+                state = self.current = state._replace(
+                    last_user_id=user_ids[-1], sent=state.sent + sent, failed=state.failed + len(results) - sent
+                )
+                self._processed += len(results)
+                await save_broadcast_progress(state.broadcast_id, state.last_user_id, state.sent, state.failed)
+                if time.monotonic() - reported >= self.progress_interval:
+                    reported = time.monotonic()
+                    await self._report(state)
+
+            status = CANCELLED if self._cancelled else DONE
+            state = self.current = state._replace(status=status)
+            await save_broadcast_progress(
+                state.broadcast_id, state.last_user_id, state.sent, state.failed, status, time.time()
+            )
+            logger.info("Broadcast #%d %s: %d sent, %d failed", state.broadcast_id, status, state.sent, state.failed)
+            await self._report(state)
+        except asyncio.CancelledError:
+            # Остановка процесса: объявление остаётся running и продолжится после перезапуска
+            raise
+        except Exception:
+            logger.exception("Broadcast #%d stopped", state.broadcast_id)
+
+    def progress(self, state: BroadcastState = None) -> dict:
+        state = state or self.current
+        elapsed = time.monotonic() - self._started
+        return {
+            "sent": state.sent,
+            "failed": state.failed,
+            "remaining": max(state.total - state.sent - state.failed, 0),
+            "msgs_per_sec": self._processed / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def format_progress(self, lang: str, state: BroadcastState = None) -> str:
+        state = state or self.current
+        return LEXICON[lang][f"broadcast_{state.status}"].format(
+            broadcast_id=state.broadcast_id, total=state.total, **self.progress(state)
+        )
+
+    async def _report(self, state: BroadcastState):
+        """Обновляет сообщение с прогрессом у админа (или отправляет новое, если его нет)"""
+        text = self.format_progress(await get_language(state.admin_id), state)
+        try:
+            if state.progress_message_id:
+                await sender.bot.edit_message_text(text, chat_id=state.admin_id, message_id=state.progress_message_id)
+            else:
+                await sender.send(state.admin_id, text)
+        except Exception as e:
+            logger.warning("Broadcast progress update failed: %r", e)
+
+    async def stop(self):
+        if self.active:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+broadcaster = Broadcaster()
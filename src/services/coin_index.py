@@ -0,0 +1,87 @@
+"""
+Поиск монет по тикеру, id и названию: отсортированный массив ключей и bisect по префиксу.
+Сначала идут точные совпадения, потом префиксные — более короткие ключи раньше, при равной
+длине — по месту в исходном списке (для топ-100 это капитализация).
+Индекс неизменяем после сборки и пересобирается целиком при замене списка монет.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+
+from src.services.market_cache import market_cache
+
+PREFIX_SCAN_LIMIT = 2000    # сколько ключей с общим префиксом просматривать за один поиск
+SHORT_PREFIX = 2            # для префиксов не длиннее этого лучшие совпадения считаются при сборке —
+SHORT_PREFIX_RESULTS = 20   # под ними тысячи ключей, и просмотр на каждый запрос был бы самым медленным
+
+
+class CoinIndex:
+    def __init__(self, coins: list = ()):
+        self.rebuild(coins)
+
+    def __len__(self):
+        return len(self.coins)
+
+    def rebuild(self, coins: list):
+        """Собирает индекс по списку монет [{"id", "symbol", "name", ...}, ...]"""
+        entries = []
+        exact = {}
+        indexed = []
+        for coin in coins:
+            coin_id = coin.get("id") if isinstance(coin, dict) else None
+            if not coin_id:
+                continue
+            rank = len(indexed)
+            indexed.append(coin)
+            for key in {coin_id.lower(), (coin.get("symbol") or "").lower(), (coin.get("name") or "").lower()}:
+                if key:
+                    entries.append((key, rank))
+                    exact.setdefault(key, []).append(rank)
+        entries.sort()
+        short = {}
+        for key, rank in entries:
+            for length in range(1, min(SHORT_PREFIX, len(key)) + 1):
+                short.setdefault(key[:length], []).append((len(key), rank))
+        for prefix, matches in short.items():
+            matches.sort()
+            short[prefix] = list(dict.fromkeys(rank for _, rank in matches))[:SHORT_PREFIX_RESULTS]
+        # Присваивание в конце: поиск во время пересборки видит старый индекс целиком
+        self._keys = [key for key, _ in entries]
+        self._ranks = array("l", (rank for _, rank in entries))
+        self._lengths = array("l", (len(key) for key, _ in entries))
+        self._exact = exact
+        self._short = short
+        self.coins = indexed
+
+    def lookup(self, query: str, limit: int = 10) -> list:
+        """Монеты по тикеру, id или началу названия; пустой список, если ничего не нашлось"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        found = list(self._exact.get(query, ()))
+        if len(query) <= SHORT_PREFIX:
+            found.extend(rank for rank in self._short.get(query, ()) if rank not in found)
+            return [self.coins[rank] for rank in found[:limit]]
+        if len(found) >= limit:
+            return [self.coins[rank] for rank in found[:limit]]
+        # Ключи с префиксом query — непрерывный отрезок отсортированного массива
+        start = bisect_left(self._keys, query)
+        end = min(bisect_left(self._keys, query + "\uffff"), start + PREFIX_SCAN_LIMIT)
+        # У монеты не больше трёх ключей, поэтому столько лучших ключей хватит на limit разных монет
+        best = heapq.nsmallest(3 * (limit + len(found)), zip(self._lengths[start:end], self._ranks[start:end]))
+        seen = set(found)
+        for _, rank in best:
+            if rank not in seen:
+                seen.add(rank)
+                found.append(rank)
+        return [self.coins[rank] for rank in found[:limit]]
+
+    def resolve(self, query: str):
+        """id монеты с таким тикером, id или названием (самой верхней в списке); None, если такой нет"""
+        ranks = self._exact.get(query.strip().lower())
+        return self.coins[ranks[0]]["id"] if ranks else None
+
+
+# Индекс топ-100 для inline-запросов: пересобирается вместе со списком монет
+top_coins_index = CoinIndex(market_cache.coins)
+market_cache.listeners.append(top_coins_index.rebuild)
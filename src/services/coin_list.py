@@ -0,0 +1,61 @@
+"""
+Полный список монет CoinGecko (~15 000 id) для поиска /find: хранится на диске и обновляется
+раз в сутки тем же механизмом, что и топ-100. В индексе монеты топ-100 идут первыми
+(по капитализации), остальные — в порядке списка, так что популярная монета всегда выше тёзок.
+"""
+import asyncio
+
+from src import DIR_DATA
+from src.constants.constants import COIN_LIST_TTL, FIND_MAX_RESULTS
+from src.services.coin_index import CoinIndex
+from src.services.market_cache import MarketListCache, market_cache
+
+COIN_LIST_PATH = "/coins/list"
+COIN_LIST_FILE = f"{DIR_DATA}/coins_list.json"
+
+coin_list = MarketListCache(
+    [], ttl=COIN_LIST_TTL, path=COIN_LIST_FILE, api_path=COIN_LIST_PATH, params={}, name="Coin list"
+)
+all_coins_index = CoinIndex()
+_rebuilding = set()         # задачи пересборки (ссылки, чтобы их не собрал GC)
+_generation = 0             # номер последней пересборки: опоздавшая старая не затирает новую
+
+
+def _rebuild_index(_coins=None):
+    """Сборка индекса на 15 000 монет занимает сотни миллисекунд — при работающем цикле она идёт в потоке"""
+    top = market_cache.coins
+    top_ids = {coin["id"] for coin in top}
+    coins = [*top, *(coin for coin in coin_list.coins if coin.get("id") not in top_ids)]
+    global _generation
+    _generation += 1
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        _swap_index(CoinIndex(coins), _generation)
+        return
+    task = asyncio.create_task(_rebuild_in_thread(coins, _generation))
+    _rebuilding.add(task)
+    task.add_done_callback(_rebuilding.discard)
+
+
+async def _rebuild_in_thread(coins: list, generation: int):
+    _swap_index(await asyncio.to_thread(CoinIndex, coins), generation)
+
+
+def _swap_index(index: CoinIndex, generation: int):
+    # Новый индекс подменяется целиком — поиск не видит наполовину собранный
+    global all_coins_index
+    if generation == _generation:
+        all_coins_index = index
+
+
+coin_list.listeners.append(_rebuild_index)
+market_cache.listeners.append(_rebuild_index)
+
+
+async def find_coins(query: str, limit: int = FIND_MAX_RESULTS) -> list:
+    """Монеты по тикеру, id или началу названия; пока полного списка нет — только среди топ-100"""
+    await coin_list.get()
+    if _rebuilding:
+        await asyncio.gather(*_rebuilding)
+    return all_coins_index.lookup(query, limit)
@@ -0,0 +1,98 @@
+"""
+Долгоживущий HTTP-клиент CoinGecko с пулом соединений.
+Создаётся в main.main() и передаётся остальному коду через set_client()/get_client().
+"""
+import asyncio
+import logging
+import aiohttp
+
+from src import COINGECKO_API_URL
+from src.constants.constants import (
+    COINGECKO_TOTAL_TIMEOUT, COINGECKO_CONNECT_TIMEOUT, COINGECKO_LIMIT_PER_HOST,
+    COINGECKO_KEEPALIVE_TIMEOUT, COINGECKO_DNS_CACHE_TTL, COINGECKO_RETRIES, COINGECKO_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CoinGeckoClient:
+    def __init__(self, base_url: str = COINGECKO_API_URL,
+                 total_timeout: float = COINGECKO_TOTAL_TIMEOUT,
+                 connect_timeout: float = COINGECKO_CONNECT_TIMEOUT,
+                 limit_per_host: int = COINGECKO_LIMIT_PER_HOST,
+                 retries: int = COINGECKO_RETRIES,
+                 backoff: float = COINGECKO_BACKOFF):
+        self.base_url = base_url.rstrip("/")
+        self.total_timeout = total_timeout
+        self.connect_timeout = connect_timeout
+        self.limit_per_host = limit_per_host
+        self.retries = retries
+        self.backoff = backoff
+        # Потолок задержки и для Retry-After: запрос из /price или inline не должен спать минутами
+        self.max_delay = backoff * 2 ** retries
+        self.requests = 0   # сколько HTTP-запросов реально ушло в CoinGecko
+        self._session = None
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=COINGECKO_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=COINGECKO_DNS_CACHE_TTL,
+        )
+        timeout = aiohttp.ClientTimeout(total=self.total_timeout, connect=self.connect_timeout)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, path: str, params: dict = None):
+        """GET-запрос с повторами и экспоненциальной задержкой на 429/5xx"""
+        if self._session is None:
+            await self.start()
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            self.requests += 1
+            try:
+                async with self._session.get(url, params=params) as response:
+                    if response.status in RETRY_STATUSES and not last_attempt:
+                        delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                        logger.warning("CoinGecko %s -> %d, retry in %.1fs", path, response.status, delay)
+                        await asyncio.sleep(delay)
+                        continue
+                    try:
+                        return await response.json(content_type=None)
+                    except (aiohttp.ContentTypeError, ValueError):
+                        # Страница ошибки вместо JSON: вызывающий получит «нет данных», а не исключение
+                        logger.warning("CoinGecko %s -> %d with a non-JSON body", path, response.status)
+                        return None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
+
+    def _retry_delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_delay)
+        return min(self.backoff * (2 ** attempt), self.max_delay)
+
+
+# ------------------------ Внедрение зависимости ------------------------
+_client = None
+
+
+def set_client(client):
+    """Подмена клиента (например, на клиент к локальному тестовому серверу)"""
+    global _client
+    _client = client
+
+
+def get_client() -> CoinGeckoClient:
+    if _client is None:
+        raise RuntimeError("CoinGecko client is not initialized, call set_client() first")
+    return _client
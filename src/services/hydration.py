@@ -0,0 +1,104 @@
+"""
+Восстановление расписания уведомлений из базы при старте бота.
+Язык и монеты в память заранее не грузятся: их читает кеш профилей по мере надобности.
+"""
+import logging
+import random
+import time
+
+from database import iter_users, get_user_changes, invalidate_profile
+from src.constants.constants import HYDRATION_CHUNK_SIZE, HYDRATION_CATCHUP_SPREAD
+from src.constants.states import user_intervals
+from src.services.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _resume_at(interval: int, next_notify_at, now: float, spread_overdue: bool = True) -> float:
+    """Когда отправить следующее уведомление после перезапуска"""
+    if next_notify_at is None:
+        return now + interval
+    if next_notify_at >= now:
+        return next_notify_at
+    if not spread_overdue:
+        return now
+    # Пропущенные за время простоя уведомления не шлём всем разом
+    return now + random.uniform(0, min(interval, HYDRATION_CATCHUP_SPREAD))
+
+
+async def hydrate_state(chunk_size: int = HYDRATION_CHUNK_SIZE, owns=None, spread_overdue: bool = True) -> int:
+    """
+    Загружает подписчиков в расписание; возвращает их число.
+    owns(user_id) -> bool ограничивает загрузку шардом воркера рассылки.
+    """
+    started = time.perf_counter()
+    now = time.time()
+    scheduled = 0
+    async for rows in iter_users(chunk_size):
+        for user_id, interval, next_notify_at in rows:
+            if owns is not None and not owns(user_id):
+                continue
+            user_intervals[user_id] = interval
+            scheduler.schedule(user_id, _resume_at(interval, next_notify_at, now, spread_overdue))
+            scheduled += 1
+    logger.info("Hydrated %d notification schedules in %.3fs", scheduled, time.perf_counter() - started)
+    return scheduled
+
+
+async def resync_shard(owns) -> int:
+    """
+    Смена состава воркеров: отдаёт чужих теперь пользователей и догружает новых для себя.
+    Пользователи, которые уже есть в расписании, не перечитываются — их состояние ведут обработчики
+    этого процесса или sync_changes, а строка из базы могла быть прочитана до их изменения.
+    """
+    async with scheduler.lock:
+        for user_id in [user_id for user_id in user_intervals if not owns(user_id)]:
+            del user_intervals[user_id]
+            scheduler.cancel(user_id)
+        now = time.time()
+        added = 0
+        async for rows in iter_users(HYDRATION_CHUNK_SIZE):
+            for user_id, interval, next_notify_at in rows:
+                if user_id in user_intervals or not owns(user_id):
+                    continue
+                user_intervals[user_id] = interval
+                scheduler.schedule(user_id, _resume_at(interval, next_notify_at, now, spread_overdue=False))
+                added += 1
+    logger.info("Shard resync: %d schedules, %d taken over", len(user_intervals), added)
+    return added
+
+
+async def reload_shard(owns) -> int:
+    """Перечитывает шард целиком — если журнал изменений мог быть почищен раньше, чем его дочитали"""
+    async with scheduler.lock:
+        scheduler.clear()
+        user_intervals.clear()
+        invalidate_profile()
+        return await hydrate_state(owns=owns, spread_overdue=False)
+
+
+async def sync_changes(owns, after_seq: int) -> int:
+    """
+    Применяет изменения пользователей из журнала user_changes после after_seq (их пишет процесс,
+    обрабатывающий обновления) и возвращает номер последней применённой записи.
+    Читаются только изменённые строки, расписание остальных не трогается.
+    """
+    async with scheduler.lock:
+        while True:
+            changes = await get_user_changes(after_seq, HYDRATION_CHUNK_SIZE)
+            if not changes:
+                return after_seq
+            now = time.time()
+            # У пользователя может быть несколько записей — строка users у всех одна и та же, текущая
+            for _, user_id, interval, next_notify_at, active in {row[1]: row for row in changes}.values():
+                invalidate_profile(user_id)
+                if not owns(user_id):
+                    continue
+                if interval and active:
+                    if user_intervals.get(user_id) != interval:
+                        user_intervals[user_id] = interval
+                        scheduler.schedule(user_id, _resume_at(interval, next_notify_at, now, spread_overdue=False))
+                else:
+                    user_intervals.pop(user_id, None)
+                    scheduler.cancel(user_id)
+            after_seq = changes[-1][0]
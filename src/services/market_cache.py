@@ -0,0 +1,113 @@
+"""
+Кеш списка топ-100 монет: фоновое обновление по TTL, отдача устаревшей копии во время
+обновления, сохранение последней удачной копии на диск для холодного старта.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+from src import DIR_DATA
+from src.constants.constants import MARKET_CACHE_TTL, MARKET_CACHE_RETRY
+from src.constants.states import top_100_cache
+from src.services.coingecko import get_client
+
+logger = logging.getLogger(__name__)
+
+MARKETS_PATH = "/coins/markets"
+MARKETS_PARAMS = {"vs_currency": "usd", "order": "market_cap_desc", "per_page": 100}
+MARKET_CACHE_FILE = f"{DIR_DATA}/top_100.json"
+
+
+class MarketListCache:
+    def __init__(self, coins: list, ttl: float = MARKET_CACHE_TTL, path: str = MARKET_CACHE_FILE,
+                 api_path: str = MARKETS_PATH, params: dict = MARKETS_PARAMS, name: str = "Top-100"):
+        self.coins = coins          # общий список из states, меняется только на месте
+        self.ttl = ttl
+        self.path = path
+        self.api_path = api_path
+        self.params = params
+        self.name = name
+        self.updated_at = 0.0
+        self.listeners = []         # вызываются после каждой замены списка (например, пересборка клавиатур)
+        self._refreshing = None     # Task текущего обновления
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self.updated_at >= self.ttl
+
+    def load_from_disk(self) -> bool:
+        """Последняя удачная копия с диска — чтобы показать клавиатуру без сети"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        coins = saved.get("coins") if isinstance(saved, dict) else None
+        if not coins:
+            return False
+        self.coins[:] = coins
+        self.updated_at = saved.get("updated_at", 0.0)
+        self._notify()
+        return True
+
+    def _save_to_disk(self, coins: list, updated_at: float):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": updated_at, "coins": coins}, f)
+        os.replace(tmp_path, self.path)
+
+    async def refresh(self, client=None) -> bool:
+        """Загружает список; при ошибке CoinGecko оставляет прежнюю копию"""
+        client = client or get_client()
+        try:
+            data = await client.get_json(self.api_path, params=self.params)
+        except Exception as e:
+            logger.warning("%s refresh failed: %r", self.name, e)
+            return False
+        if not isinstance(data, list) or not data:
+            logger.warning("%s refresh returned no data: %.200r", self.name, data)
+            return False
+        self.updated_at = time.time()
+        self.coins[:] = data
+        self._notify()
+        try:
+            await asyncio.to_thread(self._save_to_disk, data, self.updated_at)
+        except OSError as e:
+            logger.warning("Can't persist %s list: %r", self.name, e)
+        return True
+
+    def _notify(self):
+        for listener in self.listeners:
+            try:
+                listener(self.coins)
+            except Exception:
+                logger.exception("%s listener failed", self.name)
+
+    def _refresh_in_background(self, client=None):
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh(client))
+        return self._refreshing
+
+    async def get(self, client=None) -> list:
+        """Отдаёт текущий список; устаревший обновляется в фоне, пустой — ожидается"""
+        if not self.coins:
+            await self._refresh_in_background(client)
+        elif self.is_stale:
+            self._refresh_in_background(client)
+        return self.coins
+
+    async def run_refresher(self):
+        """Фоновая задача: обновляет список по истечении TTL"""
+        while True:
+            if self.is_stale:
+                ok = await self._refresh_in_background()
+                delay = self.ttl if ok else MARKET_CACHE_RETRY
+            else:
+                delay = self.ttl - (time.time() - self.updated_at)
+            await asyncio.sleep(max(delay, 1))
+
+
+market_cache = MarketListCache(top_100_cache)
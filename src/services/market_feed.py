@@ -0,0 +1,113 @@
+"""
+Лента цен: раз в interval обновляет все отслеживаемые монеты (объединение монет пользователей
+и алертов) и публикует подписчикам только изменившиеся цены через asyncio.Queue.
+Цены кладутся в общий кеш, поэтому чтение (/price, рассылка) идёт из памяти и не ждёт сети,
+а число запросов в CoinGecko зависит от числа разных монет, а не от активности пользователей.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from database import get_tracked_coins
+from src.constants.constants import MARKET_FEED_INTERVAL, MARKET_FEED_TRACKED_REFRESH, MARKET_FEED_QUEUE_SIZE
+from src.services.price_cache import price_cache
+from src.services.price_snapshot import split_into_batches
+from src.utils.get_crypto_coins import refresh_crypto_prices
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedUpdate:
+    taken_at: float
+    prices: dict        # только изменившиеся монеты: coin_id -> values в формате /simple/price
+    previous: dict      # coin_id -> прежние values; монеты, которой нет, раньше не было в ленте
+
+
+class MarketFeed:
+    def __init__(self, interval: float = MARKET_FEED_INTERVAL):
+        self.interval = interval
+        self.running = False
+        self._tracked = set()
+        self._tracked_at = None     # когда набор монет последний раз пересобран из базы (monotonic)
+        self._last = {}             # coin_id -> values из прошлого обновления
+        self._subscribers = []
+        self.ticks = 0
+        self.published = 0
+        self.dropped = 0
+
+    def track(self, coin_ids):
+        """Новые монеты начинают обновляться со следующего тика, не дожидаясь пересборки набора"""
+        self._tracked.update(coin_ids)
+
+    def subscribe(self, maxsize: int = MARKET_FEED_QUEUE_SIZE) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def _publish(self, update: FeedUpdate):
+        for queue in self._subscribers:
+            if queue.full():
+                # Медленный подписчик теряет самое старое обновление, а лента не ждёт его
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(update)
+        self.published += 1
+
+    @staticmethod
+    def _changed(old: dict, new: dict) -> bool:
+        return old is None or old.get("usd") != new.get("usd") or old.get("usd_24h_change") != new.get("usd_24h_change")
+
+    async def tick(self) -> FeedUpdate:
+        """Одно обновление всех отслеживаемых монет; публикует изменения, если они есть"""
+        if self._tracked_at is None or time.monotonic() - self._tracked_at >= MARKET_FEED_TRACKED_REFRESH:
+            # Пересборка убирает монеты, которые больше никто не отслеживает
+            self._tracked = await get_tracked_coins()
+            self._tracked_at = time.monotonic()
+        prices = {}
+        for batch in split_into_batches(self._tracked):
+            try:
+                prices.update(await refresh_crypto_prices(batch))
+            except Exception as e:
+                logger.warning("Market feed batch of %d coins failed: %r", len(batch), e)
+        self.ticks += 1
+
+        changes = {}
+        previous = {}
+        for coin_id, values in prices.items():
+            old = self._last.get(coin_id)
+            if self._changed(old, values):
+                changes[coin_id] = values
+                if old is not None:
+                    previous[coin_id] = old
+        self._last.update(prices)
+        for coin_id in self._last.keys() - self._tracked:
+            del self._last[coin_id]
+
+        update = FeedUpdate(taken_at=time.time(), prices=changes, previous=previous)
+        if changes:
+            self._publish(update)
+        return update
+
+    async def run(self):
+        """Фоновая задача ленты. Пока она работает, цены в кеше живут два её периода"""
+        self.running = True
+        price_cache.ttl = max(price_cache.ttl, 2 * self.interval)
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    await self.tick()
+                except Exception:
+                    logger.exception("Market feed tick failed")
+                await asyncio.sleep(max(self.interval - (time.monotonic() - started), 0))
+        finally:
+            self.running = False
+
+
+market_feed = MarketFeed()
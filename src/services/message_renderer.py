@@ -0,0 +1,46 @@
+"""
+Рендер сообщений с ценами для одного снимка: каждое уникальное сочетание
+(набор монет, язык) форматируется один раз, строки монет общие для всех наборов.
+"""
+from src.constants.locales import LEXICON
+from src.services.price_snapshot import PriceSnapshot
+from src.utils.get_crypto_coins import format_price_line, format_updated_time, assemble_price_message
+
+
+class SnapshotRenderer:
+    def __init__(self, snapshot: PriceSnapshot):
+        self.snapshot = snapshot
+        self.time_str = format_updated_time(snapshot.taken_at)
+        self._lines = {}        # coin_id -> строка монеты
+        self._messages = {}     # (frozenset монет, язык) -> готовый текст
+        self.renders = 0
+        self.requests = 0
+
+    def _line(self, coin_id: str) -> str:
+        line = self._lines.get(coin_id)
+        if line is None:
+            line = self._lines[coin_id] = format_price_line(coin_id, self.snapshot.prices[coin_id])
+        return line
+
+    def render(self, coin_ids: frozenset, language: str) -> str:
+        self.requests += 1
+        key = (coin_ids, language)
+        text = self._messages.get(key)
+        if text is None:
+            self.renders += 1
+            available = sorted(coin_id for coin_id in coin_ids if coin_id in self.snapshot.prices)
+            if available:
+                lines = [self._line(coin_id) for coin_id in available]
+                text = assemble_price_message(lines, language, self.time_str)
+            else:
+                text = LEXICON[language]["no_data"]
+            self._messages[key] = text
+        return text
+
+
+def group_by_message(users: dict) -> dict:
+    """{user_id: (coins, language)} -> {(frozenset(coins), language): [user_id, ...]}"""
+    groups = {}
+    for user_id, (coins, language) in users.items():
+        groups.setdefault((frozenset(coins), language), []).append(user_id)
+    return groups
@@ -1,29 +1,66 @@
 """
 Фоновая задача отправки уведомлений о цене криптовалют.
 """
-import asyncio
+import logging
 import time
-from aiogram import Bot
 
+from database import save_next_notify, get_user_profiles
 from src.constants.locales import LEXICON
-from src.constants.states import user_next_notify, user_intervals, user_coins, user_lang
-from src.utils.get_crypto_coins import get_crypto_prices, build_price_message
+from src.constants.states import user_intervals
+from src.services.price_snapshot import PriceSnapshot, take_snapshot, record_messages
+from src.services.message_renderer import SnapshotRenderer, group_by_message
+from src.services.scheduler import scheduler
+from src.services.sender import sender
 
-async def schedule_notifications(bot: Bot):
+logger = logging.getLogger(__name__)
+
+async def schedule_notifications():
     while True:
-        await asyncio.sleep(15)
-        now = time.time()
-        for uid, nxt in list(user_next_notify.items()):
-            interval = user_intervals.get(uid)
-            if not interval:
-                continue
-            if now >= nxt:
-                selected = user_coins.get(uid)
-                lang = user_lang.get(uid, "en")
-                if not selected:
-                    await bot.send_message(uid, LEXICON[lang]["no_coins_for_notify"])
-                else:
-                    data = await get_crypto_prices(selected)
-                    msg_price = build_price_message(data, lang)
-                    await bot.send_message(uid, msg_price)
-                user_next_notify[uid] = now + interval
+        due = await scheduler.wait_due()
+        async with scheduler.lock:
+            await _notify(due)
+
+
+async def _notify(due: list):
+    due = [uid for uid in due if user_intervals.get(uid)]
+    if not due:
+        return
+    now = time.time()
+    profiles = await get_user_profiles(due)
+
+    # Один снимок цен на все монеты пользователей, у которых подошло время
+    tracked = set()
+    for profile in profiles.values():
+        tracked.update(profile.coins)
+    try:
+        snapshot = await take_snapshot(tracked) if tracked else None
+    except Exception as e:
+        # Без цен всё равно переносим срок, иначе пользователи выпадут из расписания
+        logger.error("Price snapshot failed: %r", e)
+        snapshot = PriceSnapshot(prices={}, taken_at=now, upstream_calls=0)
+
+    renderer = SnapshotRenderer(snapshot) if snapshot else None
+    with_coins = {}
+    rescheduled = {}
+    for uid in due:
+        profile = profiles.get(uid)
+        selected = profile.coins if profile else None
+        lang = profile.language if profile else "en"
+        if not selected:
+            await sender.send(uid, LEXICON[lang]["no_coins_for_notify"])
+        else:
+            with_coins[uid] = (selected, lang)
+        rescheduled[uid] = now + user_intervals[uid]
+        scheduler.schedule(uid, rescheduled[uid])
+
+    # Одинаковые (монеты, язык) форматируются один раз на снимок
+    for (coins, lang), uids in group_by_message(with_coins).items():
+        msg_price = renderer.render(coins, lang)
+        for uid in uids:
+            await sender.send(uid, msg_price)
+
+    await save_next_notify(rescheduled)
+    if snapshot:
+        record_messages(len(with_coins), snapshot)
+        logger.info("Rendered %d distinct messages for %d sends", renderer.renders, len(with_coins))
+    logger.info("Sender: %s", sender.metrics())
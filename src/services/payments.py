@@ -0,0 +1,109 @@
+"""
+Платежи ЮKassa. SDK yookassa блокирующий (requests), поэтому вызовы выполняются
+в ограниченном пуле потоков с таймаутом и не останавливают event loop.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from yookassa import Payment
+
+from database import add_payment, get_due_payments, update_payments, set_user_premium
+from src.constants.constants import (
+    PREMIUM_PRICE, PAYMENTS_MAX_WORKERS, PAYMENTS_POLL_WORKERS, PAYMENTS_TIMEOUT, PAYMENT_STATUS_TTL, PAYMENT_FINAL_STATUS_TTL,
+    PAYMENT_POLL_INTERVAL, PAYMENT_POLL_BATCH, PAYMENT_POLL_BACKOFF, PAYMENT_POLL_MAX_DELAY, PAYMENT_EXPIRY
+)
+from src.constants.locales import LEXICON
+from src.constants.states import user_lang
+from src.services.sender import sender
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = {"succeeded", "canceled"}
+
+# Свои пулы у команд и у фоновой проверки: wait_for считает и время в очереди пула,
+# и пачка проверок не должна доводить до таймаута создание платежа пользователем
+_executor = ThreadPoolExecutor(max_workers=PAYMENTS_MAX_WORKERS, thread_name_prefix="yookassa")
+_poll_executor = ThreadPoolExecutor(max_workers=PAYMENTS_POLL_WORKERS, thread_name_prefix="yookassa-poll")
+_status_cache = {}      # payment_id -> (expires_at, status)
+
+
+async def _run(func, *args, executor: ThreadPoolExecutor = _executor):
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(executor, func, *args), PAYMENTS_TIMEOUT)
+
+
+async def create_payment(user_id: int):
+    """Создаёт платёж за Premium и ставит его на фоновую проверку; возвращает (payment_id, ссылка на оплату)"""
+    payment = await _run(Payment.create, {
+        "amount": {"value": PREMIUM_PRICE, "currency": "RUB"},
+        "confirmation": {"type": "redirect", "return_url": "https://t.me/YourBotUsername"},
+        "capture": True,
+        "description": f"Premium-доступ для пользователя {user_id}"
+    })
+    now = time.time()
+    await add_payment(payment.id, user_id, now, now + PAYMENT_POLL_BACKOFF)
+    return payment.id, payment.confirmation.confirmation_url
+
+
+async def get_payment_status(payment_id: str, background: bool = False) -> str:
+    """Статус платежа из API с коротким кешем; background — вызов из фоновой проверки"""
+    now = time.monotonic()
+    cached = _status_cache.get(payment_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    payment = await _run(Payment.find_one, payment_id, executor=_poll_executor if background else _executor)
+    status = payment.status
+    ttl = PAYMENT_FINAL_STATUS_TTL if status in FINAL_STATUSES else PAYMENT_STATUS_TTL
+    if len(_status_cache) > 10000:
+        for key in [key for key, (expires_at, _) in _status_cache.items() if expires_at <= now]:
+            del _status_cache[key]
+    _status_cache[payment_id] = (now + ttl, status)
+    return status
+
+
+async def verify_payment(payment_id: str) -> bool:
+    return await get_payment_status(payment_id) == "succeeded"
+
+
+# ------------------------ Фоновая проверка платежей ------------------------
+async def poll_pending_payments():
+    """Проверяет ожидающие платежи пачками с экспоненциальной задержкой и сам выдаёт Premium"""
+    while True:
+        await asyncio.sleep(PAYMENT_POLL_INTERVAL)
+        try:
+            await _poll_once()
+        except Exception:
+            logger.exception("Payment polling failed")
+
+
+async def _poll_once():
+    now = time.time()
+    due = await get_due_payments(now, PAYMENT_POLL_BATCH)
+    if not due:
+        return
+    statuses = await asyncio.gather(
+        *(get_payment_status(payment_id, background=True) for payment_id, _, _, _ in due), return_exceptions=True
+    )
+    updates = []
+    for (payment_id, user_id, created_at, attempts), status in zip(due, statuses):
+        if isinstance(status, Exception):
+            logger.warning("Payment %s status check failed: %r", payment_id, status)
+            status = "pending"
+        attempts += 1
+        if status == "succeeded":
+            await set_user_premium(user_id)
+            lang = await user_lang.get(user_id, "ru")
+            await sender.send(user_id, LEXICON[lang]["premium_congratulations"])
+        elif status != "canceled" and now - created_at > PAYMENT_EXPIRY:
+            status = "expired"
+        elif status != "canceled":
+            status = "pending"
+        delay = min(PAYMENT_POLL_BACKOFF * 2 ** attempts, PAYMENT_POLL_MAX_DELAY)
+        updates.append((status, now + delay, attempts, payment_id))
+    await update_payments(updates)
+
+
+def shutdown_payments():
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _poll_executor.shutdown(wait=False, cancel_futures=True)
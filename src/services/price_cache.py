@@ -0,0 +1,118 @@
+"""
+Кеш цен по id монеты с TTL, LRU-вытеснением и объединением одновременных запросов.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from src.constants.constants import PRICE_CACHE_TTL, PRICE_CACHE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class PriceCache:
+    def __init__(self, ttl: float = PRICE_CACHE_TTL, max_size: int = PRICE_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()   # coin_id -> (expires_at, values)
+        self._inflight = {}             # coin_id -> Future с ответом текущего запроса
+        self.listeners = []             # listener(coin_id, values, fetched_at) на каждую цену из CoinGecko
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def peek(self, coin_id: str):
+        """Свежая цена из кеша без обращения к сети (None, если нет или устарела)"""
+        entry = self._entries.get(coin_id)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at < time.monotonic():
+            del self._entries[coin_id]
+            return None
+        self._entries.move_to_end(coin_id)
+        return values
+
+    def put(self, coin_id: str, values: dict):
+        self._entries[coin_id] = (time.monotonic() + self.ttl, values)
+        self._entries.move_to_end(coin_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_many(self, coin_ids, fetcher) -> dict:
+        """
+        Цены по списку монет. В сеть уходят только отсутствующие в кеше id,
+        а id, которые уже запрашиваются, ждут общий ответ.
+        fetcher(list_of_ids) -> dict в формате /simple/price
+        """
+        found = {}
+        waiting = {}
+        missing = []
+        for coin_id in dict.fromkeys(coin_ids):
+            values = self.peek(coin_id)
+            if values is not None:
+                self.hits += 1
+                found[coin_id] = values
+            elif coin_id in self._inflight:
+                self.coalesced += 1
+                waiting[coin_id] = self._inflight[coin_id]
+            else:
+                self.misses += 1
+                missing.append(coin_id)
+
+        if missing:
+            found.update(await self._fetch(missing, fetcher))
+
+        for coin_id, future in waiting.items():
+            # shield: отмена одного ожидающего не должна отменять общий запрос
+            values = await asyncio.shield(future)
+            if values is not None:
+                found[coin_id] = values
+
+        return {coin_id: found[coin_id] for coin_id in dict.fromkeys(coin_ids) if coin_id in found}
+
+    async def refresh(self, coin_ids: list, fetcher) -> dict:
+        """Запрашивает цены в обход TTL (фоновая лента) и кладёт их в кеш"""
+        return await self._fetch(list(dict.fromkeys(coin_ids)), fetcher)
+
+    async def _fetch(self, coin_ids: list, fetcher) -> dict:
+        loop = asyncio.get_running_loop()
+        futures = {coin_id: loop.create_future() for coin_id in coin_ids}
+        self._inflight.update(futures)
+        fetched = {}
+        try:
+            data = await fetcher(coin_ids)
+            if isinstance(data, dict):
+                fetched_at = time.time()
+                for coin_id in coin_ids:
+                    values = data.get(coin_id)
+                    if isinstance(values, dict):
+                        self.put(coin_id, values)
+                        self._notify(coin_id, values, fetched_at)
+                        fetched[coin_id] = values
+        finally:
+            for coin_id, future in futures.items():
+                self._inflight.pop(coin_id, None)
+                if not future.done():
+                    future.set_result(fetched.get(coin_id))
+        return fetched
+
+    def _notify(self, coin_id: str, values: dict, fetched_at: float):
+        for listener in self.listeners:
+            try:
+                listener(coin_id, values, fetched_at)
+            except Exception:
+                logger.exception("Price listener failed")
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+        }
+
+
+price_cache = PriceCache()
@@ -0,0 +1,182 @@
+"""
+Локальная история цен: каждая цена, пришедшая из CoinGecko, попадает в OHLC-бары трёх шагов
+(1m -> 1h -> 1d). Бары монеты лежат в кольцевых буферах-массивах фиксированной длины,
+поэтому память и число строк в базе на монету ограничены и не растут со временем.
+Из истории считаются изменение за 1h/7d и текстовый спарклайн — без лишних запросов в CoinGecko.
+"""
+import asyncio
+import logging
+import time
+from array import array
+
+from database import save_price_bars, load_price_bars
+from src.constants.constants import PRICE_HISTORY_LEVELS, PRICE_HISTORY_MAX_COINS, PRICE_HISTORY_FLUSH_INTERVAL
+from src.services.price_cache import price_cache
+
+logger = logging.getLogger(__name__)
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_POINTS = 24           # часовых баров в спарклайне
+
+
+class _Ring:
+    """OHLC-бары одного шага: параллельные массивы на capacity баров, head — индекс последнего"""
+    __slots__ = ("step", "capacity", "buckets", "open", "high", "low", "close", "head", "size", "dirty")
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.buckets = array("q", bytes(8 * capacity))
+        self.open = array("d", bytes(8 * capacity))
+        self.high = array("d", bytes(8 * capacity))
+        self.low = array("d", bytes(8 * capacity))
+        self.close = array("d", bytes(8 * capacity))
+        self.head = -1
+        self.size = 0
+        self.dirty = 0          # сколько последних баров изменилось после сброса в базу
+
+    def add(self, ts: float, price: float):
+        bucket = int(ts // self.step * self.step)
+        i = self.head
+        if self.size and self.buckets[i] == bucket:
+            if price > self.high[i]:
+                self.high[i] = price
+            if price < self.low[i]:
+                self.low[i] = price
+            self.close[i] = price
+            self.dirty = max(self.dirty, 1)
+        elif not self.size or bucket > self.buckets[i]:
+            self.put_bar(bucket, price, price, price, price)
+            self.dirty = min(self.dirty + 1, self.capacity)
+
+    def put_bar(self, bucket: int, open_: float, high: float, low: float, close: float):
+        i = self.head = (self.head + 1) % self.capacity
+        self.buckets[i] = bucket
+        self.open[i], self.high[i], self.low[i], self.close[i] = open_, high, low, close
+        self.size = min(self.size + 1, self.capacity)
+
+    def indices(self, count: int = None) -> list:
+        """Индексы последних count баров от старых к новым"""
+        count = self.size if count is None else min(count, self.size)
+        return [(self.head - k) % self.capacity for k in range(count - 1, -1, -1)]
+
+    def close_at(self, ts: float, oldest: float = None):
+        """
+        Цена закрытия последнего бара, начавшегося не позже ts; None, если история короче
+        или этот бар начался раньше oldest (в истории пропуск — цен в это время не записывали)
+        """
+        for i in reversed(self.indices()):
+            if self.buckets[i] <= ts:
+                return self.close[i] if oldest is None or self.buckets[i] >= oldest else None
+        return None
+
+
+class PriceHistory:
+    def __init__(self, levels: dict = PRICE_HISTORY_LEVELS, max_coins: int = PRICE_HISTORY_MAX_COINS):
+        self.levels = levels
+        self.max_coins = max_coins
+        self._coins = {}        # coin_id -> {step: _Ring}
+
+    def __len__(self):
+        return len(self._coins)
+
+    def _rings(self, coin_id: str):
+        rings = self._coins.get(coin_id)
+        if rings is None and len(self._coins) < self.max_coins:
+            rings = self._coins[coin_id] = {step: _Ring(step, capacity) for step, capacity in self.levels.items()}
+        return rings
+
+    def record(self, coin_id: str, price: float, ts: float):
+        rings = self._rings(coin_id)
+        if rings is None:
+            return
+        for ring in rings.values():
+            ring.add(ts, price)
+
+    def on_price(self, coin_id: str, values: dict, fetched_at: float):
+        price = values.get("usd")
+        if isinstance(price, (int, float)) and price > 0:
+            self.record(coin_id, float(price), fetched_at)
+
+    def change(self, coin_id: str, period: int, step: int):
+        """Изменение в % за period по барам шага step относительно последнего бара"""
+        ring = self._coins.get(coin_id, {}).get(step)
+        if ring is None or not ring.size:
+            return None
+        latest = ring.head
+        # Опорный бар не старше period + step: иначе «1h» посчитался бы по цене многочасовой давности
+        reference = ring.close_at(ring.buckets[latest] - period, ring.buckets[latest] - period - step)
+        if not reference:
+            return None
+        return (ring.close[latest] / reference - 1) * 100
+
+    def closes(self, coin_id: str, step: int, count: int, now: float = None) -> list:
+        """Цены закрытия баров шага step за последние count шагов до now (бары старше окна не берутся)"""
+        ring = self._coins.get(coin_id, {}).get(step)
+        if ring is None:
+            return []
+        now = time.time() if now is None else now
+        oldest = int(now // step * step) - (count - 1) * step
+        return [ring.close[i] for i in ring.indices(count) if ring.buckets[i] >= oldest]
+
+    def summary(self, coin_id: str, now: float = None) -> str:
+        """«1h +0.31% | 7d -2.40% | ▁▂▄▆█» по тому, на что хватает истории; пустая строка, если ни на что"""
+        parts = []
+        for label, period, step in (("1h", 3600, 60), ("7d", 7 * 86400, 3600)):
+            change = self.change(coin_id, period, step)
+            if change is not None:
+                parts.append(f"{label} {change:+.2f}%")
+        closes = self.closes(coin_id, 3600, SPARK_POINTS, now)
+        if len(closes) > 1:
+            parts.append(sparkline(closes))
+        return " | ".join(parts)
+
+    # ------------------------ База ------------------------
+    def dirty_bars(self) -> list:
+        """Изменённые после прошлого сброса бары; счётчики изменений обнуляются"""
+        bars = []
+        for coin_id, rings in self._coins.items():
+            for step, ring in rings.items():
+                if not ring.dirty:
+                    continue
+                for i in ring.indices(ring.dirty):
+                    bars.append((coin_id, step, ring.buckets[i], ring.open[i], ring.high[i], ring.low[i], ring.close[i]))
+                ring.dirty = 0
+        return bars
+
+    async def flush(self, now: float = None) -> int:
+        now = time.time() if now is None else now
+        bars = self.dirty_bars()
+        cutoffs = {step: int(now // step * step) - (capacity - 1) * step for step, capacity in self.levels.items()}
+        await save_price_bars(bars, cutoffs)
+        return len(bars)
+
+    async def load(self) -> int:
+        rows = await load_price_bars()
+        for coin_id, step, bucket, open_, high, low, close in rows:
+            rings = self._rings(coin_id)
+            ring = rings.get(step) if rings else None
+            if ring is not None and (not ring.size or bucket > ring.buckets[ring.head]):
+                ring.put_bar(bucket, open_, high, low, close)
+        logger.info("Loaded %d price bars for %d coins", len(rows), len(self._coins))
+        return len(rows)
+
+    async def run_flusher(self, interval: float = PRICE_HISTORY_FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Price history flush failed")
+
+
+def sparkline(values: list) -> str:
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK_CHARS[len(SPARK_CHARS) // 2] * len(values)
+    scale = (len(SPARK_CHARS) - 1) / (high - low)
+    return "".join(SPARK_CHARS[round((value - low) * scale)] for value in values)
+
+
+price_history = PriceHistory()
+price_cache.listeners.append(price_history.on_price)
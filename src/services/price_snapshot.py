@@ -0,0 +1,112 @@
+"""
+Общий снимок цен на тик рассылки: монеты всех пользователей запрашиваются один раз.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from src import COINGECKO_API_URL
+from src.constants.constants import COINGECKO_MAX_IDS_PER_REQUEST, COINGECKO_MAX_URL_LENGTH
+from src.services.coingecko import get_client
+from src.utils.get_crypto_coins import get_crypto_prices, PRICE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Неизменная часть URL: всё, кроме перечня ids
+_BASE_URL_LENGTH = len(f"{COINGECKO_API_URL}{PRICE_PATH}?ids=&vs_currencies=usd&include_24hr_change=true")
+
+
+@dataclass
+class PriceSnapshot:
+    prices: dict
+    taken_at: float
+    upstream_calls: int
+
+    def for_coins(self, coin_ids) -> dict:
+        """Цены только по монетам пользователя"""
+        return {coin_id: self.prices[coin_id] for coin_id in coin_ids if coin_id in self.prices}
+
+
+@dataclass
+class SnapshotStats:
+    snapshots: int = 0
+    upstream_calls: int = 0
+    messages: int = 0
+
+    @property
+    def calls_per_message(self) -> float:
+        return self.upstream_calls / self.messages if self.messages else 0.0
+
+
+snapshot_stats = SnapshotStats()
+snapshot_listeners = []     # вызываются с каждым новым снимком (например, проверка ценовых алертов)
+
+
+class _CountingClient:
+    """Клиент CoinGecko снимка: считает только свои запросы, а не все запросы общего клиента"""
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+
+    async def get_json(self, path: str, params: dict = None):
+        self.requests += 1
+        return await self.client.get_json(path, params=params)
+
+
+def split_into_batches(coin_ids, max_ids: int = COINGECKO_MAX_IDS_PER_REQUEST,
+                       max_url_length: int = COINGECKO_MAX_URL_LENGTH) -> list:
+    """Делит id монет на пачки с учётом лимита id в запросе и длины URL"""
+    batches = []
+    current = []
+    length = _BASE_URL_LENGTH
+    for coin_id in sorted(set(coin_ids)):
+        extra = len(coin_id) + (1 if current else 0)
+        if current and (len(current) >= max_ids or length + extra > max_url_length):
+            batches.append(current)
+            current = []
+            length = _BASE_URL_LENGTH
+            extra = len(coin_id)
+        current.append(coin_id)
+        length += extra
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def take_snapshot(coin_ids) -> PriceSnapshot:
+    """Снимок цен по объединению монет; ответы с ошибкой CoinGecko пропускаются"""
+    batches = split_into_batches(coin_ids)
+    client = _CountingClient(get_client())
+    prices = {}
+    for batch in batches:
+        data = await get_crypto_prices(batch, client)
+        if not isinstance(data, dict):
+            continue
+        for coin_id in batch:
+            values = data.get(coin_id)
+            if isinstance(values, dict):
+                prices[coin_id] = values
+
+    # Только запросы пачек этого снимка: общий клиент в это же время обслуживает команды, ленту цен и алерты.
+    # Монеты, уже найденные в кеше цен или запрошенные кем-то ещё, запроса не стоят
+    upstream_calls = client.requests
+    snapshot_stats.snapshots += 1
+    snapshot_stats.upstream_calls += upstream_calls
+    snapshot = PriceSnapshot(prices=prices, taken_at=time.time(), upstream_calls=upstream_calls)
+    for listener in snapshot_listeners:
+        try:
+            listener(snapshot)
+        except Exception:
+            logger.exception("Snapshot listener failed")
+    return snapshot
+
+
+def record_messages(count: int, snapshot: PriceSnapshot = None):
+    """Учёт отправленных по снимку сообщений и отчёт о соотношении запросов к сообщениям"""
+    snapshot_stats.messages += count
+    calls = snapshot.upstream_calls if snapshot else 0
+    logger.info(
+        "Price snapshot: %d upstream calls for %d messages (total %.4f calls/message)",
+        calls, count, snapshot_stats.calls_per_message
+    )
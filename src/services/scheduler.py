@@ -0,0 +1,85 @@
+"""
+Расписание уведомлений на min-куче: спим ровно до ближайшего срока,
+забираем только тех, у кого он наступил.
+"""
+import asyncio
+import heapq
+import time
+
+from src.constants.states import user_next_notify
+
+
+class NotificationScheduler:
+    def __init__(self, due_map: dict):
+        # due_map — актуальный срок по пользователю; записи кучи, не совпадающие с ним, устарели
+        self._due = due_map
+        self._heap = []                 # (due_at, user_id)
+        self._wakeup = asyncio.Event()
+        # Держится от выдачи сроков до их переноса, чтобы перечитывание шарда не вернуло старые сроки
+        self.lock = asyncio.Lock()
+        # owns(user_id) -> bool — шард этого процесса; None — процесс уведомления не рассылает
+        self.owns = None
+
+    def __len__(self):
+        return len(self._due)
+
+    def schedule(self, user_id: int, due_at: float):
+        """Новый срок (в т.ч. смена интервала) — старая запись в куче просто игнорируется"""
+        self._due[user_id] = due_at
+        heapq.heappush(self._heap, (due_at, user_id))
+        if self._heap[0] == (due_at, user_id):
+            self._wakeup.set()
+        self._compact()
+
+    def handles(self, user_id: int) -> bool:
+        """Ведёт ли расписание пользователя этот процесс (иначе изменения подхватит его воркер из журнала)"""
+        return self.owns is not None and self.owns(user_id)
+
+    def cancel(self, user_id: int):
+        self._due.pop(user_id, None)
+
+    def clear(self):
+        self._due.clear()
+        self._heap.clear()
+        self._wakeup.set()
+
+    def next_due(self):
+        heap = self._heap
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now: float) -> list:
+        """Все пользователи со сроком <= now, O(k log N)"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due_at, user_id = heapq.heappop(heap)
+            if self._due.get(user_id) == due_at:
+                del self._due[user_id]
+                due.append(user_id)
+        return due
+
+    async def wait_due(self) -> list:
+        """Ждёт ближайшего срока (или нового, более раннего) и возвращает наступившие"""
+        while True:
+            now = time.time()
+            due = self.pop_due(now)
+            if due:
+                return due
+            next_due = self.next_due()
+            self._wakeup.clear()
+            timeout = None if next_due is None else next_due - now
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _compact(self):
+        # Много устаревших записей после смен интервала — пересобираем кучу
+        if len(self._heap) > 2 * len(self._due) + 1024:
+            self._heap = [(due_at, user_id) for user_id, due_at in self._due.items()]
+            heapq.heapify(self._heap)
+
+
+scheduler = NotificationScheduler(user_next_notify)
@@ -0,0 +1,168 @@
+"""
+Очередь отправки сообщений: пул воркеров, общий лимит Telegram (token bucket),
+лимит на чат, обработка RetryAfter и заблокировавших бота пользователей.
+"""
+import asyncio
+import logging
+import time
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest, TelegramNetworkError, TelegramServerError
+)
+
+from database import set_user_active
+from src.constants.constants import (
+    SENDER_WORKERS, SENDER_QUEUE_SIZE, SENDER_GLOBAL_RATE, SENDER_PER_CHAT_INTERVAL, SENDER_MAX_RETRIES
+)
+from src.constants.states import user_intervals
+from src.services.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+# Сколько чатов помнить для лимита на чат до чистки прошедших: записи нужны лишь per_chat_interval
+# секунд, а при рассылке на всех пользователей каждый чат встречается один раз
+CHAT_PACING_PRUNE_AT = 4096
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def set_rate(self, rate: float):
+        """Новый лимит (доля общего лимита бота меняется с числом процессов)"""
+        self.rate = rate
+        self.capacity = rate
+        self._tokens = min(self._tokens, rate)
+
+    def pause(self, seconds: float):
+        """Flood control Telegram: останавливаем все отправки на seconds"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class MessageSender:
+    def __init__(self, workers: int = SENDER_WORKERS, rate: float = SENDER_GLOBAL_RATE,
+                 per_chat_interval: float = SENDER_PER_CHAT_INTERVAL, queue_size: int = SENDER_QUEUE_SIZE):
+        self.workers = workers
+        self.per_chat_interval = per_chat_interval
+        self.bucket = TokenBucket(rate)
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.bot = None
+        self._tasks = []
+        self._chat_next = {}        # chat_id -> время, раньше которого в чат не пишем
+        self.sent = 0
+        self.failed = 0
+        self.blocked = 0
+        self.retried = 0
+        self._window = (time.monotonic(), 0)
+
+    def start(self, bot: Bot):
+        self.bot = bot
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Дожидается отправки очереди и останавливает воркеров"""
+        if self._tasks:
+            await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def send(self, chat_id: int, text: str, **kwargs):
+        """Ставит сообщение в очередь (ждёт, если очередь заполнена)"""
+        await self.queue.put((chat_id, text, kwargs))
+
+    async def deliver(self, chat_id: int, text: str, **kwargs) -> bool:
+        """Отправка в обход очереди с ожиданием результата (те же лимиты); True, если доставлено"""
+        try:
+            return await self._deliver(chat_id, text, kwargs)
+        except Exception as e:
+            # Ошибка одного сообщения не должна останавливать остальные
+            self.failed += 1
+            logger.exception("Failed to send message to %s: %r", chat_id, e)
+            return False
+
+    async def _worker(self):
+        while True:
+            chat_id, text, kwargs = await self.queue.get()
+            try:
+                await self.deliver(chat_id, text, **kwargs)
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, chat_id: int, text: str, kwargs: dict):
+        for attempt in range(SENDER_MAX_RETRIES + 1):
+            await self._wait_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id, text, **kwargs)
+                self.sent += 1
+                return True
+            except TelegramRetryAfter as e:
+                self.retried += 1
+                self.bucket.pause(e.retry_after)
+            except TelegramForbiddenError:
+                self.blocked += 1
+                await self._on_blocked(chat_id)
+                return False
+            except TelegramBadRequest as e:
+                self.failed += 1
+                logger.warning("Telegram rejected message to %s: %s", chat_id, e.message)
+                return False
+            except (TelegramNetworkError, TelegramServerError):
+                self.retried += 1
+                await asyncio.sleep(2 ** attempt)
+        self.failed += 1
+        return False
+
+    async def _wait_chat(self, chat_id: int):
+        now = time.monotonic()
+        allowed_at = self._chat_next.get(chat_id, now)
+        self._chat_next[chat_id] = max(now, allowed_at) + self.per_chat_interval
+        if len(self._chat_next) > CHAT_PACING_PRUNE_AT:
+            self._chat_next = {cid: t for cid, t in self._chat_next.items() if t > now}
+        if allowed_at > now:
+            await asyncio.sleep(allowed_at - now)
+
+    async def _on_blocked(self, chat_id: int):
+        """Пользователь заблокировал бота — больше не планируем ему уведомления"""
+        scheduler.cancel(chat_id)
+        user_intervals.pop(chat_id, None)
+        await set_user_active(chat_id, False)
+
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        window_started, window_sent = self._window
+        elapsed = now - window_started
+        self._window = (now, self.sent)
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "retried": self.retried,
+            "queue_depth": self.queue.qsize(),
+            "msgs_per_sec": (self.sent - window_sent) / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+sender = MessageSender()
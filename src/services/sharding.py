@@ -0,0 +1,97 @@
+"""
+Распределение рассылки между несколькими процессами с общей базой SQLite.
+Каждый воркер продлевает аренду в таблице workers; живые воркеры, отсортированные по id,
+делят пользователей по user_id % N. Упавший воркер перестаёт продлевать аренду,
+и через WORKER_LEASE_TTL его шард перераспределяется между оставшимися.
+Шард перечитывается только при смене состава; изменения пользователей из процесса обновлений
+воркер рассылки дочитывает из журнала user_changes на каждом heartbeat.
+"""
+import asyncio
+import logging
+import time
+
+from database import heartbeat_worker, remove_worker, last_user_change, USER_CHANGES_RETENTION
+from src.constants.constants import WORKER_LEASE_TTL, WORKER_HEARTBEAT_INTERVAL, SENDER_GLOBAL_RATE, SENDER_UPDATES_SHARE
+from src.services.hydration import resync_shard, reload_shard, sync_changes
+from src.services.alerts import alert_engine
+from src.services.sender import sender
+
+logger = logging.getLogger(__name__)
+
+
+def sender_rate(workers: int, handles_updates: bool) -> float:
+    """
+    Лимит отправки одного процесса. Единственный воркер, который сам обрабатывает обновления,
+    получает весь лимит; иначе SENDER_UPDATES_SHARE остаётся процессу обновлений (ответы, объявления),
+    а остальное делится между воркерами рассылки.
+    """
+    if handles_updates and workers == 1:
+        return SENDER_GLOBAL_RATE
+    return SENDER_GLOBAL_RATE * (1 - SENDER_UPDATES_SHARE) / workers
+
+
+class ShardLease:
+    def __init__(self, worker_id: str, lease_ttl: float = WORKER_LEASE_TTL, follow_changes: bool = True):
+        self.worker_id = worker_id
+        self.lease_ttl = lease_ttl
+        # False — процесс сам обрабатывает обновления и сам ведёт расписание и кеш профилей
+        self.follow_changes = follow_changes
+        self.change_seq = 0         # последняя применённая запись журнала user_changes
+        self._synced_at = 0.0
+        self.index = 0
+        self.count = 1
+
+    def owns(self, user_id: int) -> bool:
+        return user_id % self.count == self.index
+
+    async def heartbeat(self) -> bool:
+        """Продлевает аренду; True, если состав воркеров (и значит шард) изменился"""
+        workers = await heartbeat_worker(self.worker_id, time.time(), self.lease_ttl)
+        index, count = workers.index(self.worker_id), len(workers)
+        changed = (index, count) != (self.index, self.count)
+        self.index, self.count = index, count
+        # Лимит Telegram общий на бота: воркеры делят его поровну
+        sender.bucket.set_rate(sender_rate(count, handles_updates=not self.follow_changes))
+        if changed:
+            logger.info("Worker %s owns shard %d of %d", self.worker_id, index, count)
+        return changed
+
+    async def acquire(self):
+        """
+        Первая аренда. Если воркеров несколько, ждём, пока остальные увидят новый состав.
+        Журнал изменений дочитывается с записи, последней на момент аренды: всё, что изменится
+        во время загрузки шарда, применится на первом heartbeat.
+        """
+        await self.heartbeat()
+        if self.count > 1:
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+            await self.heartbeat()
+        self.change_seq = await last_user_change()
+        self._synced_at = time.monotonic()
+
+    async def run(self):
+        """Фоновая задача: heartbeat, перераспределение шарда при смене состава, новые алерты и изменения пользователей"""
+        while True:
+            await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
+            try:
+                if await self.heartbeat():
+                    await resync_shard(self.owns)
+                    await alert_engine.reload(self.owns)
+                await alert_engine.sync()
+                if self.follow_changes:
+                    await self.sync()
+            except Exception:
+                logger.exception("Shard heartbeat failed")
+
+    async def sync(self):
+        if time.monotonic() - self._synced_at >= USER_CHANGES_RETENTION:
+            # Журнал старше USER_CHANGES_RETENTION чистится — пропущенные записи уже не прочитать
+            seq = await last_user_change()
+            await reload_shard(self.owns)
+        else:
+            seq = await sync_changes(self.owns, self.change_seq)
+        self.change_seq = seq
+        self._synced_at = time.monotonic()
+
+    async def release(self):
+        await remove_worker(self.worker_id)
@@ -0,0 +1,95 @@
+"""
+Хранилища состояния пользователей вместо неограниченных словарей.
+MemoryStore — временное состояние интерфейса (страница, id служебных сообщений): размер ограничен,
+брошенные на полпути сценарии вытесняются сами.
+PersistentStore — долговременные настройки: поле профиля из таблицы users, чтение через кеш профилей.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+from database import get_user_profile
+from src.constants.constants import UI_STATE_MAX_SIZE, UI_STATE_TTL
+
+V = TypeVar("V")
+_MISSING = object()
+
+
+class StateStore(ABC, Generic[V]):
+    @abstractmethod
+    async def get(self, user_id: int, default: Optional[V] = None) -> Optional[V]:
+        ...
+
+    @abstractmethod
+    async def set(self, user_id: int, value: V):
+        ...
+
+
+class MemoryStore(StateStore[V]):
+    """
+    Приближённый LRU с TTL на двух поколениях словарей: запись и чтение переносят ключ в текущее,
+    текущее становится прошлым каждые ttl / 2 или при заполнении половины max_size, прошлое выбрасывается.
+    Ключ живёт без обращений от ttl / 2 до ttl, всего не больше max_size ключей,
+    и на запись не тратится ничего сверх ячейки словаря (ни отметки времени, ни узла списка).
+    """
+
+    def __init__(self, max_size: int = UI_STATE_MAX_SIZE, ttl: float = UI_STATE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._current = {}
+        self._previous = {}
+        self._rotated_at = time.monotonic()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._current) + len(self._previous)
+
+    async def get(self, user_id: int, default: Optional[V] = None) -> Optional[V]:
+        self._rotate_if_due()
+        value = self._current.get(user_id, _MISSING)
+        if value is _MISSING:
+            value = self._previous.pop(user_id, _MISSING)
+            if value is _MISSING:
+                return default
+            self._current[user_id] = value
+        return value
+
+    async def set(self, user_id: int, value: V):
+        self._rotate_if_due()
+        self._previous.pop(user_id, None)
+        self._current[user_id] = value
+
+    async def delete(self, user_id: int):
+        self._current.pop(user_id, None)
+        self._previous.pop(user_id, None)
+
+    async def pop(self, user_id: int, default: Optional[V] = None) -> Optional[V]:
+        value = await self.get(user_id, default)
+        self._current.pop(user_id, None)
+        return value
+
+    def _rotate_if_due(self):
+        elapsed = time.monotonic() - self._rotated_at
+        if elapsed < self.ttl / 2 and len(self._current) < self.max_size // 2:
+            return
+        self.evictions += len(self._previous)
+        if elapsed >= self.ttl:
+            # Простой дольше ttl — устарели оба поколения
+            self.evictions += len(self._current)
+            self._current = {}
+        self._previous, self._current = self._current, {}
+        self._rotated_at = time.monotonic()
+
+
+class PersistentStore(StateStore[V]):
+    def __init__(self, field: str, save: Callable[[int, V], Awaitable]):
+        self.field = field
+        self._save = save
+
+    async def get(self, user_id: int, default: Optional[V] = None) -> Optional[V]:
+        profile = await get_user_profile(user_id)
+        value = getattr(profile, self.field) if profile is not None else None
+        return default if value is None else value
+
+    async def set(self, user_id: int, value: V):
+        await self._save(user_id, value)
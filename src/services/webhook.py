@@ -0,0 +1,83 @@
+"""
+Режим webhook: приём обновлений через aiohttp-сервер aiogram вместо long polling.
+"""
+import asyncio
+import logging
+import secrets
+import signal
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from src import (
+    WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_MAX_CONCURRENT_UPDATES
+)
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TIMEOUT = 30      # сколько ждём завершения начатых обработчиков при остановке
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    """Отвечает Telegram сразу, а обрабатывает не более max_concurrent обновлений одновременно"""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str = None,
+                 max_concurrent: int = WEBHOOK_MAX_CONCURRENT_UPDATES, **data):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def _background_feed_update(self, bot: Bot, update: dict):
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+    async def drain(self, app: web.Application = None, timeout: float = DRAIN_TIMEOUT):
+        """Ждёт уже принятые обновления перед остановкой"""
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+        logger.info("Draining %d in-flight updates", len(tasks))
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+
+def build_webhook_app(bot: Bot, dp: Dispatcher, secret_token: str,
+                      max_concurrent: int = WEBHOOK_MAX_CONCURRENT_UPDATES, path: str = WEBHOOK_PATH):
+    app = web.Application()
+    handler = LimitedRequestHandler(dp, bot, secret_token=secret_token, max_concurrent=max_concurrent)
+    # drain регистрируем раньше, чем register() добавит закрытие сессии бота
+    app.on_shutdown.append(handler.drain)
+    handler.register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app, handler
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Регистрирует webhook в Telegram и обслуживает его до SIGINT/SIGTERM"""
+    if not WEBHOOK_URL:
+        raise RuntimeError("USE_WEBHOOK is set but WEBHOOK_URL is empty")
+    secret_token = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    await bot.set_webhook(
+        f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+        secret_token=secret_token,
+        max_connections=min(WEBHOOK_MAX_CONCURRENT_UPDATES, 100),
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    app, _ = build_webhook_app(bot, dp, secret_token)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    logger.info("Webhook server listening on %s:%d%s", WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await runner.cleanup()
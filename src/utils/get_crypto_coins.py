@@ -1,55 +1,62 @@
-import aiohttp
 from datetime import datetime
 from src.constants.locales import LEXICON
-from src.constants.states import top_100_cache
+from src.services.coingecko import get_client
+from src.services.market_cache import market_cache
+from src.services.price_cache import price_cache
+from src.services.price_history import price_history
+
+PRICE_PATH = "/simple/price"
 
 
 # ------------------------ CoinGecko ------------------------
-async def get_top_100_coins():
-    global top_100_cache
-    if top_100_cache:
-        return top_100_cache
-    url = "https://api.coingecko.com/api/v3/coins/markets"
-    params = {"vs_currency": "usd", "order": "market_cap_desc", "per_page": 100}
-    conn = aiohttp.TCPConnector(ssl=False)
-    async with aiohttp.ClientSession(connector=conn) as session:
-        async with session.get(url, params=params) as response:
-            data = await response.json()
-            if isinstance(data, list):
-                top_100_cache = data
-            else:
-                top_100_cache = []
-            return top_100_cache
-
-async def get_crypto_prices(coin_ids):
+async def get_top_100_coins(client=None):
+    return await market_cache.get(client)
+
+async def get_crypto_prices(coin_ids, client=None):
+    """Цены выбранных монет: из кеша, в CoinGecko уходят только недостающие id"""
     if not coin_ids:
         return {}
-    url = "https://api.coingecko.com/api/v3/simple/price"
+    return await price_cache.get_many(coin_ids, lambda ids: _fetch_prices(ids, client))
+
+async def refresh_crypto_prices(coin_ids, client=None):
+    """Свежие цены в обход TTL кеша — для фоновой ленты цен"""
+    return await price_cache.refresh(coin_ids, lambda ids: _fetch_prices(ids, client))
+
+async def _fetch_prices(coin_ids, client=None):
+    client = client or get_client()
     params = {
         "ids": ",".join(coin_ids),
         "vs_currencies": "usd",
         "include_24hr_change": "true"
     }
-    conn = aiohttp.TCPConnector(ssl=False)
-    async with aiohttp.ClientSession(connector=conn) as session:
-        async with session.get(url, params=params) as response:
-            return await response.json()
+    return await client.get_json(PRICE_PATH, params=params)
+
+def format_price_line(coin: str, values: dict) -> str:
+    """Строка одной монеты — не зависит от языка, поэтому её можно переиспользовать"""
+    emoji = "🔸"
+    price = values.get('usd', 'N/A')
+    change = values.get('usd_24h_change', 0.0)
+    change_icon = "📈" if change >= 0 else "📉"
+    # 1h/7d и спарклайн — из локальной истории, если она уже накопилась
+    history = price_history.summary(coin)
+    return (
+        f"{emoji} <b>{coin.title()}</b>\n"
+        f"• ${price:,} | {change_icon} {change:.2f}% (24h)\n"
+        + (f"• {history}\n" if history else "")
+    )
+
+def format_updated_time(timestamp: float = None) -> str:
+    moment = datetime.utcfromtimestamp(timestamp) if timestamp is not None else datetime.utcnow()
+    return moment.strftime('%d.%m.%Y %H:%M (UTC)')
+
+def assemble_price_message(lines, language: str, time_str: str) -> str:
+    header = LEXICON[language]["current_prices_header"]
+    updated_label = LEXICON[language]["updated_time"]
+    message_parts = [f"{header}\n", *lines, f"{updated_label} {time_str}"]
+    return "\n".join(message_parts)
 
 def build_price_message(data, language: str):
     if not data:
         return LEXICON[language]["no_data"]
-    header = LEXICON[language]["current_prices_header"]
-    updated_label = LEXICON[language]["updated_time"]
-    message_parts = [f"{header}\n"]
-    for coin, values in data.items():
-        emoji = "🔸"
-        price = values.get('usd', 'N/A')
-        change = values.get('usd_24h_change', 0.0)
-        change_icon = "📈" if change >= 0 else "📉"
-        message_parts.append(
-            f"{emoji} <b>{coin.title()}</b>\n"
-            f"• ${price:,} | {change_icon} {change:.2f}% (24h)\n"
-        )
-    time_str = datetime.utcnow().strftime('%d.%m.%Y %H:%M (UTC)')
-    message_parts.append(f"{updated_label} {time_str}")
-    return "\n".join(message_parts)
\ No newline at end of file
+    lines = [format_price_line(coin, values) for coin, values in data.items()]
+    return assemble_price_message(lines, language, format_updated_time())
@@ -8,10 +8,13 @@ async def setup_bot_commands(bot: Bot):
     commands = [
         BotCommand(command="start", description="See start information"),
         BotCommand(command="choice_coin", description="Select coins"),
+        BotCommand(command="find", description="Find any coin"),
         BotCommand(command="price", description="Get crypto prices"),
         BotCommand(command="menu", description="Show menu"),
         BotCommand(command="change_lang", description="Change language"),
         BotCommand(command="change_interval", description="Change interval notification"),
+        BotCommand(command="alert", description="Set a price alert"),
+        BotCommand(command="alerts", description="My price alerts"),
         BotCommand(command="get_premium", description="Upgrade to premium")
     ]
     await bot.set_my_commands(commands, scope=BotCommandScopeDefault())
\ No newline at end of file
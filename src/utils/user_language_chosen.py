@@ -1,5 +1,5 @@
 from aiogram.types import Message, CallbackQuery
-from src.constants.states import user_lang
+from src.constants.states import user_lang, awaiting_language
 from src.constants.locales import LEXICON
 
 
@@ -9,7 +9,7 @@ def user_language_chosen(func):
     async def wrapper(event, *args, **kwargs):
         if isinstance(event, (Message, CallbackQuery)):
             uid = event.from_user.id
-            if uid not in user_lang or user_lang[uid] is None:
+            if await awaiting_language.get(uid) or await user_lang.get(uid) is None:
                 await event.answer(
                     LEXICON["ru"]["unknown_command_before_lang"] + "\n" +
                     LEXICON["en"]["unknown_command_before_lang"]
@@ -0,0 +1,34 @@
+from src.services.price_history import PriceHistory
+
+HOUR = 3600
+DAY = 86400
+
+
+def test_change_and_sparkline_over_continuous_history():
+    history = PriceHistory()
+    for minute in range(61):
+        history.record("bitcoin", 100 + minute, minute * 60)
+    assert history.change("bitcoin", HOUR, 60) == (160 / 100 - 1) * 100
+    assert history.summary("bitcoin", now=HOUR).startswith("1h +60.00% | ")
+
+
+def test_gap_in_history_gives_no_change_or_sparkline():
+    history = PriceHistory()
+    history.record("bitcoin", 100, 0)
+    history.record("bitcoin", 150, 5 * HOUR)
+    # Цены часовой давности нет — опорный бар пятичасовой
+    assert history.change("bitcoin", HOUR, 60) is None
+    assert "1h" not in history.summary("bitcoin", now=5 * HOUR)
+
+    history.record("bitcoin", 200, 10 * DAY)
+    assert history.change("bitcoin", 7 * DAY, HOUR) is None
+    # В окне последних суток только один бар — спарклайна нет
+    assert history.summary("bitcoin", now=10 * DAY) == ""
+
+
+def test_sparkline_skips_bars_outside_last_day():
+    history = PriceHistory()
+    history.record("bitcoin", 100, 0)
+    history.record("bitcoin", 120, 2 * DAY)
+    history.record("bitcoin", 130, 2 * DAY + HOUR)
+    assert history.closes("bitcoin", HOUR, 24, now=2 * DAY + HOUR) == [120, 130]